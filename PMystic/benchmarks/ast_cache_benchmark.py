@@ -0,0 +1,49 @@
+import os
+import sys
+import tempfile
+from common import ErrorSink, best_of, front_end
+from mystic_interpreter import Interpreter
+from ast_cache import AstCache
+
+
+FUNCTION = """
+fun helper{n}(a, b) {{
+  store total = 0;
+  for (store i = 0; i < a; i = i + 1) {{
+    if (i > b) total = total + i * 2; else total = total - 1;
+  }}
+  return total + a - b / 3;
+}}
+print helper{n}(3, 1);
+"""
+
+
+class AstCacheBenchmark:
+    def __init__(self, functions: int):
+        self.__source = "".join(FUNCTION.format(n=n) for n in range(functions))
+
+    def run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            script = os.path.join(directory, "script.my")
+            cache = AstCache(script)
+
+            cold_time, (statements, resolver) = best_of(3, self.__front_end)
+            cache.store(self.__source, statements)
+            warm_time, loaded = best_of(3, cache.load, self.__source)
+            if loaded is None:
+                raise AssertionError("cache entry did not load")
+
+            print(f"source: {len(self.__source) / 1024:.1f} KB")
+            print(f"cache entry: {os.path.getsize(cache.path) / 1024:.1f} KB")
+            print(f"scan + parse + resolve {cold_time * 1000:9.2f} ms")
+            print(f"cache load             {warm_time * 1000:9.2f} ms")
+            print(f"speedup                {cold_time / warm_time:9.2f}x")
+
+    def __front_end(self):
+        sink = ErrorSink()
+        sink.interpreter = Interpreter(sink)
+        return front_end(self.__source, sink)
+
+
+functions = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+AstCacheBenchmark(functions).run()
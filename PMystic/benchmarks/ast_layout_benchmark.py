@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools")
+
+FIB = """
+fun fib(n) {
+  if (n <= 1) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+store total = 0;
+for (store i = 0; i < 2000; i = i + 1) {
+  total = total + i * 2 - 1;
+}
+print fib(18) + total;
+"""
+
+
+class AstLayoutBenchmark:
+    """
+    Regenerates Expr/Stmt with and without __slots__ into scratch
+    directories and measures each layout in a fresh interpreter process.
+    """
+
+    layouts = (("plain ", ["--no-slots"]), ("slots ", []))
+
+    def run(self):
+        generator = os.path.join(TOOLS_DIR, "generate_ast.py")
+        for label, flags in self.layouts:
+            with tempfile.TemporaryDirectory() as directory:
+                subprocess.run(
+                    [sys.executable, generator, directory] + flags, check=True
+                )
+                result = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", directory],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                )
+                print(label + result.stdout.strip())
+
+
+def measure(ast_dir):
+    sys.path.insert(0, ast_dir)
+    import expr
+
+    if os.path.dirname(os.path.abspath(expr.__file__)) != os.path.abspath(ast_dir):
+        raise AssertionError("generated AST module was not picked up")
+
+    from common import ErrorSink, best_of, front_end
+    from mystic_interpreter import Interpreter
+
+    source = FIB * 200
+    sink = ErrorSink()
+    sink.interpreter = Interpreter(sink)
+    tracemalloc.start()
+    statements, _ = front_end(source, sink)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nodes = count_nodes(statements)
+
+    sink = ErrorSink()
+    sink.interpreter = Interpreter(sink)
+    statements, _ = front_end(FIB.replace("print", "total ="), sink)
+    elapsed, _ = best_of(3, sink.interpreter.interpret, statements)
+
+    print(
+        f"nodes {nodes:7d}  {size / nodes:6.1f} bytes/node  "
+        f"interpret {elapsed * 1000:8.1f} ms"
+    )
+
+
+def count_nodes(node):
+    if isinstance(node, list):
+        return sum(count_nodes(item) for item in node)
+    if not hasattr(node, "accept"):
+        return 0
+    fields = vars(node) if hasattr(node, "__dict__") else type(node).__slots__
+    return 1 + sum(count_nodes(getattr(node, field)) for field in fields)
+
+
+if len(sys.argv) > 2 and sys.argv[1] == "--child":
+    measure(sys.argv[2])
+else:
+    AstLayoutBenchmark().run()
@@ -0,0 +1,89 @@
+import contextlib
+import io
+import sys
+from common import ErrorSink, best_of, front_end
+import environment
+import mystic_function
+import mystic_interpreter
+from mystic_interpreter import Interpreter
+
+
+PROGRAMS = {
+    "for": """
+store total = 0;
+for (store i = 0; i < 100000; i = i + 1) {
+  total = total + i;
+}
+print total;
+""",
+    "nested": """
+store total = 0;
+for (store i = 0; i < 300; i = i + 1) {
+  for (store j = 0; j < 300; j = j + 1) {
+    if (j < i) {
+      total = total + 1;
+    } else {
+      total = total - 1;
+    }
+  }
+}
+print total;
+""",
+    "calls": """
+fun step(n) {
+  if (n > 0) {
+    return n - 1;
+  }
+  return n;
+}
+store n = 0;
+while (n < 50000) {
+  n = n + 1;
+  step(n);
+}
+print n;
+""",
+}
+
+
+class CountingFrame(environment.Frame):
+    __slots__ = ()
+    count = 0
+
+    def __init__(self, size, enclosing=None):
+        CountingFrame.count += 1
+        super().__init__(size, enclosing)
+
+
+class BlockBenchmark:
+    """Times the tree-walker on loop-heavy programs and counts the Frames
+    it allocates for blocks and calls."""
+
+    def __init__(self, programs: list):
+        self.__programs = programs
+
+    def run(self):
+        print(f"{'program':10}{'time':>10}{'frames':>10}")
+        for name in self.__programs:
+            elapsed, frames = best_of(3, self.__run, PROGRAMS[name])
+            print(f"{name:10}{elapsed:9.3f}s{frames:10}")
+
+    def __run(self, source):
+        sink = ErrorSink()
+        sink.interpreter = Interpreter(sink)
+        statements, _ = front_end(source, sink)
+
+        CountingFrame.count = 0
+        mystic_interpreter.Frame = mystic_function.Frame = CountingFrame
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                sink.interpreter.interpret(statements)
+        finally:
+            mystic_interpreter.Frame = mystic_function.Frame = environment.Frame
+        if sink.errors:
+            raise AssertionError(f"tree failed: {sink.errors}")
+        return CountingFrame.count
+
+
+programs = sys.argv[1].split(",") if len(sys.argv) > 1 else list(PROGRAMS)
+BlockBenchmark(programs).run()
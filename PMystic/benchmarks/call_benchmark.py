@@ -0,0 +1,80 @@
+import contextlib
+import io
+import sys
+from common import ErrorSink, best_of, front_end
+import closure_compiler
+import environment
+import mystic_function
+import mystic_interpreter
+from mystic import Mystic
+
+
+PROGRAMS = {
+    "fib": """
+fun fib(n) {
+  if (n <= 1) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+print fib(20);
+""",
+    "leaf": """
+fun add(a, b) {
+  store sum = a + b;
+  return sum;
+}
+store total = 0;
+for (store i = 0; i < 50000; i = i + 1) total = add(total, i);
+print total;
+""",
+}
+
+MODULES = (mystic_interpreter, mystic_function, closure_compiler)
+
+
+class CountingFrame(environment.Frame):
+    __slots__ = ()
+    count = 0
+
+    def __init__(self, size, enclosing=None):
+        CountingFrame.count += 1
+        super().__init__(size, enclosing)
+
+
+class CallBenchmark:
+    """Times call-heavy programs and counts the Frames each engine allocates
+    for them."""
+
+    def __init__(self, engines: list, programs: list):
+        self.__engines = engines
+        self.__programs = programs
+
+    def run(self):
+        print(f"{'program':10}{'engine':>10}{'time':>10}{'frames':>10}")
+        for name in self.__programs:
+            for engine in self.__engines:
+                elapsed, frames = best_of(3, self.__run, engine, PROGRAMS[name])
+                print(f"{name:10}{engine:>10}{elapsed:9.3f}s{frames:10}")
+
+    def __run(self, engine, source):
+        sink = ErrorSink()
+        sink.interpreter = Mystic.engines[engine](sink)
+        statements, _ = front_end(source, sink)
+        program = sink.interpreter.prepare(statements)
+
+        CountingFrame.count = 0
+        for module in MODULES:
+            module.Frame = CountingFrame
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                sink.interpreter.interpret(program)
+        finally:
+            for module in MODULES:
+                module.Frame = environment.Frame
+        if sink.errors:
+            raise AssertionError(f"{engine} failed: {sink.errors}")
+        return CountingFrame.count
+
+
+engines = sys.argv[1].split(",") if len(sys.argv) > 1 else ["tree", "closure"]
+programs = sys.argv[2].split(",") if len(sys.argv) > 2 else list(PROGRAMS)
+CallBenchmark(engines, programs).run()
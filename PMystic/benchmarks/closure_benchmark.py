@@ -0,0 +1,80 @@
+import contextlib
+import io
+import sys
+import tracemalloc
+from common import ErrorSink, best_of, front_end
+from mystic_interpreter import Interpreter
+
+
+PROGRAMS = {
+    # Each closure is made inside a scope full of locals it never uses.
+    "retained": """
+fun make(n) {
+  store a = n; store b = n; store c = n; store d = n;
+  store e = n; store f = n; store g = n; store h = n;
+  {
+    store x = n;
+    {
+      store y = n;
+      fun get() { return n; }
+      return get;
+    }
+  }
+}
+store keep = nil;
+for (store i = 0; i < 20000; i = i + 1) {
+  fun link(prev, fn) {
+    fun next() { return prev; }
+    return next;
+  }
+  keep = link(keep, make(i));
+}
+print keep;
+""",
+    # Reads and writes of a variable three functions out.
+    "access": """
+fun outer() {
+  store count = 0;
+  fun middle() {
+    fun inner() {
+      for (store i = 0; i < 100000; i = i + 1) count = count + 1;
+      return count;
+    }
+    return inner;
+  }
+  return middle();
+}
+print outer()();
+""",
+}
+
+
+class ClosureBenchmark:
+    """Times the tree-walker on closure-heavy programs and reports the peak
+    memory traced while each one runs."""
+
+    def __init__(self, programs: list):
+        self.__programs = programs
+
+    def run(self):
+        print(f"{'program':10}{'time':>10}{'peak':>12}")
+        for name in self.__programs:
+            elapsed, _ = best_of(3, self.__run, PROGRAMS[name])
+            tracemalloc.start()
+            self.__run(PROGRAMS[name])
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{name:10}{elapsed:9.3f}s{peak / 1024:10.0f}KB")
+
+    def __run(self, source):
+        sink = ErrorSink()
+        sink.interpreter = Interpreter(sink)
+        statements, _ = front_end(source, sink)
+        with contextlib.redirect_stdout(io.StringIO()):
+            sink.interpreter.interpret(statements)
+        if sink.errors:
+            raise AssertionError(f"tree failed: {sink.errors}")
+
+
+programs = sys.argv[1].split(",") if len(sys.argv) > 1 else list(PROGRAMS)
+ClosureBenchmark(programs).run()
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "mystic"))
+
+
+class ErrorSink:
+    """Stands in for Mystic when a benchmark drives the pipeline directly."""
+
+    def __init__(self):
+        self.errors = []
+        self.is_repl = False
+        self.interpreter = None
+
+    def error(self, line, message):
+        self.errors.append((line, message))
+
+    def error_at(self, token, message):
+        self.errors.append((token.line, message))
+
+    def runtime_error(self, error):
+        self.errors.append((error.token.line, error.message))
+
+
+def best_of(repeat, func, *args):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def read_example(name):
+    path = os.path.join(BENCH_DIR, "..", "..", name)
+    with open(path, "rb") as file:
+        return file.read().decode()
+
+
+def front_end(source, sink):
+    """Scan, parse and resolve source against sink.interpreter."""
+    from regex_scanner import RegexScanner
+    from mystic_parser import MysticParser
+    from resolver import Resolver
+
+    statements = MysticParser(RegexScanner(source, sink).tokens(), sink).parse()
+    resolver = Resolver(sink)
+    resolver.resolve(statements)
+    if sink.errors:
+        raise AssertionError(f"front end errors: {sink.errors[:3]}")
+    return statements, resolver
@@ -0,0 +1,111 @@
+import contextlib
+import io
+import sys
+from common import ErrorSink, best_of, front_end
+from mystic import Mystic
+
+
+PROGRAMS = {
+    "fib": """
+fun fib(n) {
+  if (n <= 1) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+for (store i = 0; i < 20; i = i + 1) {
+  print fib(i);
+}
+""",
+    "loop": """
+store a;
+store total = 0;
+for (a = 0; a < 200000; a = a + 1) {
+  if (a == 5000) {
+    total = total + 1;
+  } else {
+    total = total + a;
+  }
+}
+print total;
+""",
+    "strings": """
+store s = "";
+for (store i = 0; i < 20000; i = i + 1) {
+  s = s + "x" + i;
+}
+print s;
+""",
+    "closures": """
+fun makeCounter() {
+  store i = 0;
+  fun count() {
+    i = i + 1;
+    return i;
+  }
+  return count;
+}
+store counter = makeCounter();
+for (store j = 0; j < 50000; j = j + 1) counter();
+print counter();
+""",
+    "continues": """
+store i = 0;
+store odd = 0;
+store skip = false;
+while (i < 200000) {
+  i = i + 1;
+  skip = !skip;
+  if (skip) continue;
+  odd = odd + 1;
+}
+print odd;
+""",
+    "conditions": """
+fun noop() {}
+store values = "";
+store hits = 0;
+for (store i = 0; i < 100000; i = i + 1) {
+  if (i) hits = hits + 1;
+  if (values) hits = hits + 1;
+  if (noop) hits = hits + 1;
+  if (!nil and i < 50000 or false) hits = hits + 1;
+  values = i == 500 ? "x" : values;
+}
+print hits;
+""",
+}
+
+
+class EngineBenchmark:
+    def __init__(self, engines: list, programs: list):
+        self.__engines = engines
+        self.__programs = programs
+
+    def run(self):
+        print("program   " + "".join(f"{engine:>12}" for engine in self.__engines))
+        for program in self.__programs:
+            times = []
+            outputs = set()
+            for engine in self.__engines:
+                elapsed, output = best_of(3, self.__run, engine, PROGRAMS[program])
+                times.append(elapsed)
+                outputs.add(output)
+            if len(outputs) != 1:
+                raise AssertionError(f"engines disagree on {program}")
+            print(f"{program:10}" + "".join(f"{t:11.3f}s" for t in times))
+
+    def __run(self, engine, source):
+        sink = ErrorSink()
+        sink.interpreter = Mystic.engines[engine](sink)
+        statements, _ = front_end(source, sink)
+        program = sink.interpreter.prepare(statements)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            sink.interpreter.interpret(program)
+        if sink.errors:
+            raise AssertionError(f"{engine} failed: {sink.errors}")
+        return output.getvalue()
+
+
+engines = sys.argv[1].split(",") if len(sys.argv) > 1 else list(Mystic.engines)
+programs = sys.argv[2].split(",") if len(sys.argv) > 2 else list(PROGRAMS)
+EngineBenchmark(engines, programs).run()
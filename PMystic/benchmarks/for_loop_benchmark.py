@@ -0,0 +1,175 @@
+import contextlib
+import io
+import sys
+from common import ErrorSink, best_of, front_end
+from optimizer import Optimizer
+from type_inference import TypeInference
+from mystic import Mystic
+
+
+# Each program as a for loop and as the block and while loop the parser used
+# to desugar it into.
+PROGRAMS = {
+    # One counter up to a literal bound.
+    "sum": (
+        """
+{
+  store total = 0;
+  for (store i = 0; i < 200000; i = i + 1) total = total + i;
+  print total;
+}
+""",
+        """
+{
+  store total = 0;
+  {
+    store i = 0;
+    while (i < 200000) {
+      total = total + i;
+      i = i + 1;
+    }
+  }
+  print total;
+}
+""",
+    ),
+    # Nested loops with a branch on every iteration.
+    "nested": (
+        """
+{
+  store hits = 0;
+  for (store i = 0; i < 400; i = i + 1) {
+    for (store j = 0; j < 400; j = j + 1) {
+      if (i * j > i + j) hits = hits + 1;
+    }
+  }
+  print hits;
+}
+""",
+        """
+{
+  store hits = 0;
+  {
+    store i = 0;
+    while (i < 400) {
+      {
+        store j = 0;
+        while (j < 400) {
+          if (i * j > i + j) hits = hits + 1;
+          j = j + 1;
+        }
+      }
+      i = i + 1;
+    }
+  }
+  print hits;
+}
+""",
+    ),
+    # Counting down by a step to a bound held in a local.
+    "down": (
+        """
+{
+  store low = 0;
+  store count = 0;
+  for (store i = 600000; i >= low; i = i - 3) count = count + 1;
+  print count;
+}
+""",
+        """
+{
+  store low = 0;
+  store count = 0;
+  {
+    store i = 600000;
+    while (i >= low) {
+      count = count + 1;
+      i = i - 3;
+    }
+  }
+  print count;
+}
+""",
+    ),
+    # continue out of a block that declares a local, which the increment
+    # must not see.
+    "continue": (
+        """
+{
+  store total = 0;
+  for (store i = 0; i < 200000; i = i + 1) {
+    store half = i / 2;
+    if (half < 1000) continue;
+    total = total + half;
+  }
+  print total;
+}
+""",
+        """
+{
+  store total = 0;
+  {
+    store i = 0;
+    while (i < 200000) {
+      store half = i / 2;
+      if (half < 1000) {
+        i = i + 1;
+        continue;
+      }
+      total = total + half;
+      i = i + 1;
+    }
+  }
+  print total;
+}
+""",
+    ),
+}
+
+
+class ForLoopBenchmark:
+    """Times for loops against the while loops they used to be desugared
+    into, on every engine. The engine "jit" is the tree-walker with its loop
+    JIT, which the others run without."""
+
+    def __init__(self, engines: list, programs: list):
+        self.__engines = engines
+        self.__programs = programs
+
+    def run(self):
+        print(f"{'program':10}{'engine':>10}{'while':>10}{'for':>10}")
+        for name in self.__programs:
+            for_source, while_source = PROGRAMS[name]
+            for engine in self.__engines:
+                desugared, expected = best_of(3, self.__run, engine, while_source)
+                counted, output = best_of(3, self.__run, engine, for_source)
+                if output != expected:
+                    raise AssertionError(f"{name}: for loop output differs")
+                print(f"{name:10}{engine:>10}{desugared:9.3f}s{counted:9.3f}s")
+
+    def __run(self, engine, source):
+        sink = ErrorSink()
+        jit = engine == "jit"
+        sink.interpreter = Mystic.engines["tree" if jit else engine](sink)
+        if not jit:
+            # Keep the tree-walker on its nodes instead of compiled loops.
+            sink.interpreter.jit = None
+        statements, _ = front_end(source, sink)
+        statements = Optimizer(sink.interpreter).optimize(statements)
+        statements = TypeInference(sink.interpreter).specialize(statements)
+        program = sink.interpreter.prepare(statements)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            sink.interpreter.interpret(program)
+        if sink.errors:
+            raise AssertionError(f"{engine} failed: {sink.errors}")
+        return output.getvalue()
+
+
+engines = (
+    sys.argv[1].split(",")
+    if len(sys.argv) > 1
+    else ["tree", "jit", "closure", "vm", "python"]
+)
+programs = sys.argv[2].split(",") if len(sys.argv) > 2 else list(PROGRAMS)
+ForLoopBenchmark(engines, programs).run()
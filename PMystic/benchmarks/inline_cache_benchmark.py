@@ -0,0 +1,69 @@
+import contextlib
+import io
+import sys
+from common import ErrorSink, best_of, front_end
+from mystic_interpreter import Interpreter
+
+
+PROGRAMS = {
+    # The fib loop from test.my: recursion through a global function.
+    "fib": """
+fun fib(n) {
+  if (n <= 1) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+for (store i = 0; i < 20; i = i + 1) {
+  print fib(i);
+}
+""",
+    # Global constants and a global accumulator updated every iteration.
+    "globals": """
+store scale = 3;
+store offset = 7;
+store total = 0;
+fun weigh(x) {
+  return x * scale + offset;
+}
+store i = 0;
+while (i < 50000) {
+  total = total + weigh(i);
+  i = i + 1;
+}
+print total;
+""",
+}
+
+
+class InlineCacheBenchmark:
+    """Times the tree-walker on global-heavy programs and reports how often
+    the inline caches on global variables and call sites hit."""
+
+    def __init__(self, programs: list):
+        self.__programs = programs
+
+    def run(self):
+        print(f"{'program':10}{'time':>10}{'globals':>10}{'calls':>10}")
+        for name in self.__programs:
+            elapsed, interpreter = best_of(3, self.__run, PROGRAMS[name])
+            globals_rate = self.__rate(
+                interpreter.global_hits, interpreter.global_misses
+            )
+            calls_rate = self.__rate(interpreter.call_hits, interpreter.call_misses)
+            print(f"{name:10}{elapsed:9.3f}s{globals_rate:9.2f}%{calls_rate:9.2f}%")
+
+    def __rate(self, hits, misses):
+        return 100 * hits / max(hits + misses, 1)
+
+    def __run(self, source):
+        sink = ErrorSink()
+        sink.interpreter = Interpreter(sink)
+        statements, _ = front_end(source, sink)
+        with contextlib.redirect_stdout(io.StringIO()):
+            sink.interpreter.interpret(statements)
+        if sink.errors:
+            raise AssertionError(f"tree failed: {sink.errors}")
+        return sink.interpreter
+
+
+programs = sys.argv[1].split(",") if len(sys.argv) > 1 else list(PROGRAMS)
+InlineCacheBenchmark(programs).run()
@@ -0,0 +1,90 @@
+import contextlib
+import io
+import sys
+from common import ErrorSink, best_of, front_end
+from mystic_interpreter import Interpreter
+
+
+PROGRAMS = {
+    # Float arithmetic on loop-carried locals.
+    "float": """
+store x = 0.5;
+store total = 0.0;
+store i = 0;
+while (i < 200000) {
+  total = total + x * 2 - 1;
+  i = i + 1;
+}
+print total;
+""",
+    # Integer counters and a branch on every iteration.
+    "int": """
+store hits = 0;
+for (store i = 0; i < 200000; i = i + 1) {
+  if (i * 3 > i + 1000) hits = hits + 1;
+}
+print hits;
+""",
+    # A call to a global function on every iteration.
+    "call": """
+fun square(n) { return n * n; }
+store total = 0;
+for (store i = 0; i < 50000; i = i + 1) total = total + square(i);
+print total;
+""",
+    # One loop runs on floats after being compiled for ints, one on ints
+    # after being compiled for floats.
+    "deopt": """
+fun sum(start) {
+  store acc = start;
+  for (store i = 0; i < 5000; i = i + 1) acc = acc + 1;
+  return acc;
+}
+for (store i = 0; i < 20; i = i + 1) print sum(0.5) + sum(1);
+""",
+}
+
+
+class LoopJitBenchmark:
+    """Times the tree-walker on loop-heavy programs with and without the loop
+    JIT, and reports how many loops it compiled, rejected and deoptimized."""
+
+    def __init__(self, programs: list):
+        self.__programs = programs
+
+    def run(self):
+        print(
+            f"{'program':10}{'no jit':>10}{'jit':>10}"
+            f"{'compiled':>10}{'rejected':>10}{'deopts':>8}"
+        )
+        for name in self.__programs:
+            source = PROGRAMS[name]
+            plain, expected = best_of(3, self.__run, source, None)
+            jitted, (output, jit) = best_of(
+                3, self.__run, source, Interpreter.jit_threshold
+            )
+            if output != expected:
+                raise AssertionError(f"{name}: jit output differs")
+            print(
+                f"{name:10}{plain:9.3f}s{jitted:9.3f}s"
+                f"{jit.compiled:10}{jit.rejected:10}{jit.deopts:8}"
+            )
+
+    def __run(self, source, threshold):
+        sink = ErrorSink()
+        sink.interpreter = Interpreter(sink)
+        if threshold is None:
+            sink.interpreter.jit = None
+        statements, _ = front_end(source, sink)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            sink.interpreter.interpret(statements)
+        if sink.errors:
+            raise AssertionError(f"tree failed: {sink.errors}")
+        if threshold is None:
+            return output.getvalue()
+        return output.getvalue(), sink.interpreter.jit
+
+
+programs = sys.argv[1].split(",") if len(sys.argv) > 1 else list(PROGRAMS)
+LoopJitBenchmark(programs).run()
@@ -0,0 +1,51 @@
+import contextlib
+import io
+import sys
+from common import ErrorSink, best_of, front_end
+from mystic import Mystic
+from mystic_token import Token
+from token_type import TokenType
+
+
+FIB = """
+%sfun fib(n) {
+  if (n <= 1) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+print fib(%d);
+"""
+
+
+class MemoBenchmark:
+    def __init__(self, engine: str, sizes: list):
+        self.__engine = engine
+        self.__sizes = sizes
+
+    def run(self):
+        print(f"engine: {self.__engine}")
+        print(f"{'':10}{'plain':>12}{'memo':>12}{'hits':>8}{'misses':>8}")
+        for n in self.__sizes:
+            plain, _ = best_of(3, self.__run, FIB % ("", n))
+            memo, function = best_of(3, self.__run, FIB % ("memo ", n))
+            cache = function.cache
+            print(
+                f"{f'fib({n})':10}{plain:11.4f}s{memo:11.4f}s"
+                f"{cache.hits:8}{cache.misses:8}"
+            )
+
+    def __run(self, source):
+        sink = ErrorSink()
+        sink.interpreter = Mystic.engines[self.__engine](sink)
+        statements, _ = front_end(source, sink)
+        program = sink.interpreter.prepare(statements)
+        with contextlib.redirect_stdout(io.StringIO()):
+            sink.interpreter.interpret(program)
+        if sink.errors:
+            raise AssertionError(f"{self.__engine} failed: {sink.errors}")
+        name = Token(TokenType.IDENTIFIER, "fib", None, 0)
+        return sink.interpreter.globals.get(name)
+
+
+engine = sys.argv[1] if len(sys.argv) > 1 else "tree"
+sizes = [int(n) for n in sys.argv[2].split(",")] if len(sys.argv) > 2 else [15, 20, 25]
+MemoBenchmark(engine, sizes).run()
@@ -0,0 +1,61 @@
+import sys
+from common import ErrorSink, best_of, front_end
+from mystic_interpreter import Interpreter
+
+
+CASES = {
+    "+": "3 + 2",
+    "-": "3 - 2",
+    "*": "3 * 2",
+    "/": "3 / 2",
+    ">": "3 > 2",
+    ">=": "3 >= 2",
+    "<": "3 < 2",
+    "<=": "3 <= 2",
+    "==": "3 == 2",
+    "!=": "3 != 2",
+    "str+str": '"x" + "y"',
+    "str+num": '"x" + 2',
+    "neg": "-3",
+    "not": "!3",
+    "and": "3 and 2",
+    "or": "nil or 2",
+}
+
+
+class OperatorBenchmark:
+    """
+    Evaluates one expression node per operator over and over on the
+    tree-walker. Operands are literals and the cost of evaluating a bare
+    literal is subtracted, so each figure is the operator's own cost.
+    """
+
+    def __init__(self, cases: list, iterations: int):
+        self.__cases = cases
+        self.__iterations = iterations
+        self.__sink = ErrorSink()
+        self.__sink.interpreter = Interpreter(self.__sink)
+
+    def run(self):
+        base = self.__time("3")
+        print(f"{'operator':10}{'ns/op':>10}")
+        for name in self.__cases:
+            elapsed = self.__time(CASES[name]) - base
+            print(f"{name:10}{elapsed / self.__iterations * 1e9:10.1f}")
+
+    def __time(self, source):
+        statements, _ = front_end(source + ";", self.__sink)
+        expr = statements[0].expression
+        elapsed, _ = best_of(5, self.__evaluate, expr)
+        return elapsed
+
+    def __evaluate(self, expr):
+        accept = expr.accept
+        interpreter = self.__sink.interpreter
+        for _ in range(self.__iterations):
+            accept(interpreter)
+
+
+cases = sys.argv[1].split(",") if len(sys.argv) > 1 else list(CASES)
+iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+OperatorBenchmark(cases, iterations).run()
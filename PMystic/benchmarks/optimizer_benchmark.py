@@ -0,0 +1,83 @@
+import contextlib
+import io
+import sys
+from common import ErrorSink, best_of, front_end
+from optimizer import Optimizer
+from mystic import Mystic
+
+
+PROGRAMS = {
+    # The constant arithmetic from test.my, evaluated in a loop.
+    "arith": """
+store total = 0;
+for (store i = 0; i < 50000; i = i + 1) {
+  total = total + (5 + 6 * 10 - 4);
+}
+print total;
+""",
+    # Strings, ternaries and logical operators over literals.
+    "strings": """
+store last = nil;
+for (store i = 0; i < 50000; i = i + 1) {
+  last = (true ? "a" + "b" : "c") + (nil or "d");
+}
+print last;
+""",
+    # Debug branches behind a literal flag.
+    "branches": """
+fun step(n) {
+  if (false) print "step " + n;
+  if (1 > 2) { print "never"; } else { n = n + (2 * 3); }
+  return n;
+}
+store n = 0;
+for (store i = 0; i < 30000; i = i + 1) n = step(n);
+print n;
+""",
+}
+
+
+class OptimizerBenchmark:
+    """Times programs with and without the optimizer and reports how many
+    nodes it removed from each."""
+
+    def __init__(self, engines: list, programs: list):
+        self.__engines = engines
+        self.__programs = programs
+
+    def run(self):
+        print(
+            f"{'program':10}{'engine':>10}{'plain':>10}{'optimized':>11}{'removed':>9}"
+        )
+        for name in self.__programs:
+            source = PROGRAMS[name]
+            for engine in self.__engines:
+                plain, (expected, _) = best_of(3, self.__run, engine, source, False)
+                optimized, (output, removed) = best_of(
+                    3, self.__run, engine, source, True
+                )
+                if output != expected:
+                    raise AssertionError(f"{name}: optimized output differs")
+                print(
+                    f"{name:10}{engine:>10}{plain:9.3f}s{optimized:10.3f}s{removed:9}"
+                )
+
+    def __run(self, engine, source, optimize):
+        sink = ErrorSink()
+        sink.interpreter = Mystic.engines[engine](sink)
+        statements, _ = front_end(source, sink)
+        optimizer = Optimizer(sink.interpreter)
+        if optimize:
+            statements = optimizer.optimize(statements)
+        program = sink.interpreter.prepare(statements)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            sink.interpreter.interpret(program)
+        if sink.errors:
+            raise AssertionError(f"{engine} failed: {sink.errors}")
+        return output.getvalue(), optimizer.removed
+
+
+engines = sys.argv[1].split(",") if len(sys.argv) > 1 else ["tree", "closure", "vm"]
+programs = sys.argv[2].split(",") if len(sys.argv) > 2 else list(PROGRAMS)
+OptimizerBenchmark(engines, programs).run()
@@ -0,0 +1,68 @@
+import sys
+from common import ErrorSink, best_of
+from regex_scanner import RegexScanner
+from mystic_parser import MysticParser
+from mystic_token import Token
+
+
+EXPRESSIONS = """
+store a = 1;
+store b = 2;
+a = b = (a + b) * 3 - -4 / 5 >= 6 == !(7 < 8) != false;
+print a or b;
+print a and b or nil;
+print a < b ? "less" : "more" + "!";
+print clock() - f(g(1, 2), h(x)(y), "s") * 2.5;
+a = 1 + 2 + 3 + 4 + 5 + 6 + 7 + 8 + 9 + 10;
+print a and b ? a : b;
+"""
+
+
+class ParserBenchmark:
+    def __init__(self, copies: int):
+        self.__source = EXPRESSIONS * copies
+
+    def run(self):
+        tokens = RegexScanner(self.__source, ErrorSink()).scan_tokens()
+        print(f"tokens: {len(tokens)}")
+
+        old_time, old_tree = best_of(3, self.__parse, tokens, False)
+        new_time, new_tree = best_of(3, self.__parse, tokens, True)
+
+        self.__check_same(old_tree, new_tree)
+        print(f"recursive descent   {old_time:8.3f}s")
+        print(f"precedence climbing {new_time:8.3f}s")
+        print(f"speedup             {old_time / new_time:8.2f}x")
+
+    def __parse(self, tokens, precedence_climbing):
+        sink = ErrorSink()
+        statements = MysticParser(tokens, sink, precedence_climbing).parse()
+        if sink.errors:
+            raise AssertionError(f"parse errors: {sink.errors[:3]}")
+        return statements
+
+    def __check_same(self, old, new):
+        if type(old) is not type(new):
+            raise AssertionError(f"{type(old).__name__} != {type(new).__name__}")
+        if isinstance(old, list):
+            if len(old) != len(new):
+                raise AssertionError("list lengths differ")
+            for old_item, new_item in zip(old, new):
+                self.__check_same(old_item, new_item)
+        elif isinstance(old, Token):
+            if old is not new:
+                raise AssertionError(f"tokens differ: {old} / {new}")
+        elif hasattr(old, "accept"):
+            for field in self.__fields(old):
+                self.__check_same(getattr(old, field), getattr(new, field))
+        elif old != new:
+            raise AssertionError(f"values differ: {old!r} / {new!r}")
+
+    def __fields(self, node):
+        if hasattr(node, "__dict__"):
+            return vars(node)
+        return type(node).__slots__
+
+
+copies = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+ParserBenchmark(copies).run()
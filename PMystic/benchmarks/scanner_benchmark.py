@@ -0,0 +1,59 @@
+import sys
+from common import ErrorSink, best_of, read_example
+from scanner import Scanner
+from regex_scanner import RegexScanner
+
+
+SNIPPET = """
+fun fib(n) {
+  if (n <= 1) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+
+/* block comment
+   spanning lines */
+for (store i = 0; i < 20; i = i + 1) {
+  print fib(i) >= 3.25 ? "big" : "small";   // trailing comment
+  store s = "multi
+line string";
+  while (!(i == 10) and i != 11 or nil) { i = i * 2 / 1 - -1; }
+}
+"""
+
+
+class ScannerBenchmark:
+    def __init__(self, megabytes: float):
+        unit = SNIPPET + read_example("test.my")
+        self.__source = unit * max(1, int(megabytes * 1024 * 1024 / len(unit)))
+
+    def run(self):
+        size = len(self.__source) / (1024 * 1024)
+        print(f"source: {size:.2f} MB")
+
+        old_time, old_tokens = best_of(3, self.__scan, Scanner)
+        new_time, new_tokens = best_of(3, self.__scan, RegexScanner)
+
+        self.__check_same(old_tokens, new_tokens)
+        print(f"tokens: {len(new_tokens)}")
+        print(f"Scanner       {old_time:8.3f}s  {size / old_time:8.2f} MB/s")
+        print(f"RegexScanner  {new_time:8.3f}s  {size / new_time:8.2f} MB/s")
+        print(f"speedup       {old_time / new_time:8.2f}x")
+
+    def __scan(self, scanner_class):
+        return scanner_class(self.__source, ErrorSink()).scan_tokens()
+
+    def __check_same(self, expected, actual):
+        if len(expected) != len(actual):
+            raise AssertionError("token counts differ")
+        for old, new in zip(expected, actual):
+            if (old.token_type, old.lexeme, old.literal, old.line) != (
+                new.token_type,
+                new.lexeme,
+                new.literal,
+                new.line,
+            ):
+                raise AssertionError(f"tokens differ: {old} / {new}")
+
+
+megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+ScannerBenchmark(megabytes).run()
@@ -0,0 +1,55 @@
+import sys
+import time
+import tracemalloc
+from common import ErrorSink
+from regex_scanner import RegexScanner
+from mystic_parser import MysticParser
+
+
+STATEMENT = "store v = (1 + 2) * 3 - 4 / 5;\n"
+
+
+class StreamingBenchmark:
+    def __init__(self, statements: int):
+        self.__source = STATEMENT * statements
+
+    def run(self):
+        print(f"statements: {self.__source.count(chr(10))}")
+        self.__report("list  ", lambda scanner: scanner.scan_tokens())
+        self.__report("stream", lambda scanner: scanner.tokens())
+        self.__first_error("list  ", lambda scanner: scanner.scan_tokens())
+        self.__first_error("stream", lambda scanner: scanner.tokens())
+
+    def __report(self, label, tokens_of):
+        tracemalloc.start()
+        start = time.perf_counter()
+        self.__parse(self.__source, tokens_of, ErrorSink())
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label}  parse {elapsed:7.3f}s  peak {peak / (1024 * 1024):8.2f} MB")
+
+    def __first_error(self, label, tokens_of):
+        sink = FirstErrorSink()
+        self.__parse("print ;\n" + self.__source, tokens_of, sink)
+        print(f"{label}  first error after {sink.elapsed * 1000:9.2f} ms")
+
+    def __parse(self, source, tokens_of, sink):
+        statements = MysticParser(tokens_of(RegexScanner(source, sink)), sink).parse()
+        return len(statements)
+
+
+class FirstErrorSink(ErrorSink):
+    def __init__(self):
+        super().__init__()
+        self.__start = time.perf_counter()
+        self.elapsed = None
+
+    def error_at(self, token, message):
+        if self.elapsed is None:
+            self.elapsed = time.perf_counter() - self.__start
+        super().error_at(token, message)
+
+
+statements = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+StreamingBenchmark(statements).run()
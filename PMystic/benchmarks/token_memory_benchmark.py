@@ -0,0 +1,48 @@
+import sys
+import tracemalloc
+from common import ErrorSink, read_example
+import regex_scanner
+from regex_scanner import RegexScanner
+from mystic_token import Token
+
+
+class DictToken:
+    """The Token layout before __slots__, kept here for comparison."""
+
+    def __init__(self, token_type, lexeme, literal, line):
+        self.token_type = token_type
+        self.lexeme = lexeme
+        self.literal = literal
+        self.line = line
+
+
+class TokenMemoryBenchmark:
+    def __init__(self, megabytes: float):
+        unit = read_example("test.my")
+        self.__source = unit * max(1, int(megabytes * 1024 * 1024 / len(unit)))
+
+    def run(self):
+        print(f"source: {len(self.__source) / (1024 * 1024):.2f} MB")
+        self.__measure("dict tokens ", DictToken)
+        self.__measure("slot tokens ", Token)
+
+    def __measure(self, label, token_class):
+        regex_scanner.Token = token_class
+        try:
+            tracemalloc.start()
+            tokens = RegexScanner(self.__source, ErrorSink()).scan_tokens()
+            size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        finally:
+            regex_scanner.Token = Token
+
+        lexemes = {id(token.lexeme) for token in tokens}
+        print(
+            f"{label} tokens {len(tokens):9d}  "
+            f"{size / len(tokens):7.1f} bytes/token  "
+            f"{len(lexemes):7d} distinct lexeme objects"
+        )
+
+
+megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+TokenMemoryBenchmark(megabytes).run()
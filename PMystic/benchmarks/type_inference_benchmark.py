@@ -0,0 +1,93 @@
+import contextlib
+import io
+import sys
+from common import ErrorSink, best_of, front_end
+from optimizer import Optimizer
+from type_inference import TypeInference
+from mystic import Mystic
+
+
+PROGRAMS = {
+    # Integer counters and accumulators in block scope.
+    "sum": """
+{
+  store total = 0;
+  for (store i = 0; i < 100000; i = i + 1) total = total + i * 2 - 1;
+  print total;
+}
+""",
+    # Float arithmetic and comparisons on globals.
+    "float": """
+store x = 0.0;
+store v = 1.5;
+store steps = 0;
+while (x < 100000) {
+  x = x + v / 2;
+  steps = steps + 1;
+}
+print steps;
+""",
+    # Nested loops over locals with a branch on every iteration.
+    "nested": """
+{
+  store hits = 0;
+  for (store i = 0; i < 300; i = i + 1) {
+    for (store j = 0; j < 300; j = j + 1) {
+      if (i * j > i + j) hits = hits + 1;
+    }
+  }
+  print hits;
+}
+""",
+}
+
+
+class TypeInferenceBenchmark:
+    """Times numeric loops before and after type inference specializes their
+    arithmetic, and reports how many nodes it specialized."""
+
+    def __init__(self, engines: list, programs: list):
+        self.__engines = engines
+        self.__programs = programs
+
+    def run(self):
+        print(
+            f"{'program':10}{'engine':>10}{'generic':>10}"
+            f"{'specialized':>13}{'nodes':>7}"
+        )
+        for name in self.__programs:
+            source = PROGRAMS[name]
+            for engine in self.__engines:
+                generic, (expected, _) = best_of(3, self.__run, engine, source, False)
+                specialized, (output, nodes) = best_of(
+                    3, self.__run, engine, source, True
+                )
+                if output != expected:
+                    raise AssertionError(f"{name}: specialized output differs")
+                print(
+                    f"{name:10}{engine:>10}{generic:9.3f}s"
+                    f"{specialized:12.3f}s{nodes:7}"
+                )
+
+    def __run(self, engine, source, specialize):
+        sink = ErrorSink()
+        sink.interpreter = Mystic.engines[engine](sink)
+        # Keep the tree-walker on its nodes instead of compiled loops.
+        sink.interpreter.jit = None
+        statements, _ = front_end(source, sink)
+        statements = Optimizer(sink.interpreter).optimize(statements)
+        inference = TypeInference(sink.interpreter)
+        if specialize:
+            statements = inference.specialize(statements)
+        program = sink.interpreter.prepare(statements)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            sink.interpreter.interpret(program)
+        if sink.errors:
+            raise AssertionError(f"{engine} failed: {sink.errors}")
+        return output.getvalue(), inference.specialized
+
+
+engines = sys.argv[1].split(",") if len(sys.argv) > 1 else ["tree", "closure", "python"]
+programs = sys.argv[2].split(",") if len(sys.argv) > 2 else list(PROGRAMS)
+TypeInferenceBenchmark(engines, programs).run()
@@ -0,0 +1,58 @@
+import gc
+import sys
+import tracemalloc
+from common import ErrorSink, best_of, front_end
+from mystic_interpreter import Interpreter
+
+
+LOOP = """
+{
+  store a = 1;
+  store b = 2;
+  store c = 0;
+  for (store i = 0; i < %d; i = i + 1) {
+    c = c + a * b - a;
+    a = b;
+    b = c - a + i;
+  }
+}
+"""
+
+REPL_LINE = "{ store x = 1; x = x + x; { store y = x; y = y * x; } }"
+
+
+class VariableBenchmark:
+    def __init__(self, iterations: int, lines: int):
+        self.__iterations = iterations
+        self.__lines = lines
+
+    def run(self):
+        sink = self.__sink()
+        statements, _ = front_end(LOOP % self.__iterations, sink)
+        elapsed, _ = best_of(3, sink.interpreter.interpret, statements)
+        print(f"variable loop, {self.__iterations} iterations: {elapsed:.3f}s")
+
+        sink = self.__sink()
+        tracemalloc.start()
+        first = self.__repl(sink, self.__lines)
+        second = self.__repl(sink, self.__lines)
+        tracemalloc.stop()
+        growth = (second - first) / self.__lines
+        print(f"REPL memory growth over {self.__lines} lines: {growth:.1f} bytes/line")
+
+    def __sink(self):
+        sink = ErrorSink()
+        sink.interpreter = Interpreter(sink)
+        return sink
+
+    def __repl(self, sink, lines):
+        for _ in range(lines):
+            statements, _ = front_end(REPL_LINE, sink)
+            sink.interpreter.interpret(statements)
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0]
+
+
+iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+lines = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+VariableBenchmark(iterations, lines).run()
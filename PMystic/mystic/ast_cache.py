@@ -0,0 +1,79 @@
+import hashlib
+import os
+import pickle
+import sys
+import zlib
+
+
+class AstCache:
+    """
+    On-disk cache of resolved programs, kept in a __mysticcache__ directory
+    next to the script. Each entry holds what an engine's prepare() made of
+    the source (the resolved statement tree for the AST walkers), keyed by a
+    hash of the source and of the interpreter itself. Missing, stale or
+    corrupt entries simply read as a cache miss.
+    """
+
+    DIRECTORY = "__mysticcache__"
+    SUFFIX = ".mystc"
+    MAGIC = b"MYSTC\x01"
+    __version = None
+
+    def __init__(self, script_path: str, suffix: str = SUFFIX):
+        directory, name = os.path.split(os.path.abspath(script_path))
+        self.path = os.path.join(directory, self.DIRECTORY, name + suffix)
+
+    @classmethod
+    def version(cls) -> bytes:
+        # Any change to the interpreter sources invalidates every entry.
+        if cls.__version is None:
+            digest = hashlib.sha256(sys.version.encode())
+            source_dir = os.path.dirname(os.path.abspath(__file__))
+            for name in sorted(os.listdir(source_dir)):
+                if name.endswith(".py"):
+                    with open(os.path.join(source_dir, name), "rb") as file:
+                        digest.update(name.encode())
+                        digest.update(file.read())
+            cls.__version = digest.digest()
+        return cls.__version
+
+    def __header(self, source: str) -> bytes:
+        return (
+            self.MAGIC + self.version() + hashlib.sha256(source.encode()).digest()
+        )
+
+    def load(self, source: str):
+        """Return the cached program for source, or None on a miss."""
+        try:
+            with open(self.path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+
+        header = self.__header(source)
+        if not data.startswith(header):
+            return None
+
+        try:
+            return pickle.loads(zlib.decompress(data[len(header) :]))
+        except Exception:
+            return None
+
+    def store(self, source: str, program):
+        try:
+            payload = pickle.dumps(program, pickle.HIGHEST_PROTOCOL)
+        except RecursionError:
+            return
+
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temp_path, "wb") as file:
+                file.write(self.__header(source))
+                file.write(zlib.compress(payload))
+            os.replace(temp_path, self.path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
@@ -0,0 +1,12 @@
+# Generic access to the fields of Expr and Stmt nodes, for passes that walk
+# every node without a visit method per type. Nodes are generated either with
+# __slots__ or, by `generate_ast.py --no-slots`, with an instance __dict__,
+# so the field names come from whichever of the two the node has.
+
+
+def fields(node) -> tuple:
+    """Names of node's fields and annotations, in declaration order."""
+    slots = getattr(type(node), "__slots__", None)
+    if slots:
+        return slots
+    return tuple(vars(node))
@@ -0,0 +1,624 @@
+from operator import eq, ge, gt, le, lt, ne
+from expr import Expr
+from stmt import Stmt
+from token_type import TokenType
+from runtime_error import RTE
+from environment import Frame
+from mystic_callable import MysticCallable
+from mystic_interpreter import Interpreter
+from mystic_memo import MemoizedFunction
+from counted_loop import CountedLoop
+import mystic_number as number
+from mystic_number import MAX_EXACT, NUMBER_TYPES, is_number
+from mystic_return import BREAK, CONTINUE, Return, TailCall
+from mystic_truth import is_truthy
+
+
+class CompiledFunction(MysticCallable):
+    __slots__ = ("name", "params", "local_count", "body", "closure", "frames", "blank")
+
+    def __init__(self, name, params, local_count, body, closure, escapes):
+        self.name = name
+        self.params = params
+        self.local_count = local_count
+        self.body = body
+        self.closure = closure
+        # Frames of a function that declares no functions die with the call,
+        # so finished ones are kept for reuse. Otherwise frames is None.
+        self.frames = None if escapes else []
+        self.blank = (None,) * local_count
+
+    def arity(self):
+        return self.params
+
+    def call(self, interpreter, arguments):
+        function = self
+        while True:
+            frames = function.frames
+            if frames:
+                frame = frames.pop()
+            else:
+                frame = Frame(function.local_count, function.closure)
+            frame.values[: len(arguments)] = arguments
+            signal = function.body(frame)
+            if frames is not None:
+                frame.values[:] = function.blank
+                frames.append(frame)
+            if type(signal) is TailCall:
+                function = signal.function
+                arguments = signal.arguments
+                continue
+            if type(signal) is Return:
+                return signal.value
+            return None
+
+    def __str__(self):
+        return f"<fn {self.name}>"
+
+
+class ClosureCompiler(Expr.Visitor, Stmt.Visitor):
+    """
+    Turns a resolved AST into nested Python closures. Every expression
+    becomes a function of the current environment that returns its value,
+    and every statement becomes one that returns a completion signal, so
+    running a program is just calling closures.
+    """
+
+    def __init__(self, interpreter):
+        self.__interpreter = interpreter
+        self.__globals = interpreter.globals
+        self.__stringify = interpreter._stringify
+
+    def compile(self, statements):
+        return self.__sequence([self.__statement(stmt) for stmt in statements])
+
+    # ------- Helper Functions ------- #
+
+    def __statement(self, stmt):
+        return stmt.accept(self)
+
+    def __expr(self, expr):
+        return expr.accept(self)
+
+    def __sequence(self, closures):
+        if len(closures) == 1:
+            return closures[0]
+
+        if len(closures) == 2:
+            first, second = closures
+
+            def run_pair(env):
+                signal = first(env)
+                if signal is not None:
+                    return signal
+                return second(env)
+
+            return run_pair
+
+        def run_sequence(env):
+            for closure in closures:
+                signal = closure(env)
+                if signal is not None:
+                    return signal
+            return None
+
+        return run_sequence
+
+    def __define(self, stmt, value_of):
+        name = stmt.name.lexeme
+        slot = stmt.slot
+
+        if slot is None:
+            define = self.__globals.define
+
+            def define_global(env):
+                define(name, value_of(env))
+
+            return define_global
+
+        def define_local(env):
+            env.values[slot] = value_of(env)
+
+        return define_local
+
+    # ------- Statements ------- #
+
+    def visit_block_stmt(self, stmt):
+        body = self.__sequence([self.__statement(s) for s in stmt.statements])
+        size = stmt.local_count
+        if size == 0:
+            return body
+
+        def run_block(env):
+            return body(Frame(size, env))
+
+        return run_block
+
+    def visit_break_stmt(self, stmt):
+        return lambda env: BREAK
+
+    def visit_continue_stmt(self, stmt):
+        return lambda env: CONTINUE
+
+    def visit_expression_stmt(self, stmt):
+        expression = self.__expr(stmt.expression)
+
+        if self.__interpreter.is_repl():
+            stringify = self.__stringify
+
+            def echo(env):
+                print(stringify(expression(env)))
+
+            return echo
+
+        def run_expression(env):
+            expression(env)
+
+        return run_expression
+
+    def visit_for_stmt(self, stmt):
+        initializer = None
+        if stmt.initializer is not None:
+            initializer = self.__statement(stmt.initializer)
+        condition = self.__expr(stmt.condition)
+        increment = None
+        if stmt.increment is not None:
+            increment = self.__expr(stmt.increment)
+        body = self.__statement(stmt.body)
+
+        counted = CountedLoop.match(stmt)
+        if counted is not None:
+            slot = counted.slot
+            bound = self.__expr(counted.bound)
+            steps_of = counted.steps
+
+        def run_for(env):
+            if initializer is not None:
+                initializer(env)
+            if counted is not None:
+                steps = steps_of(env.values[slot], bound(env))
+                if steps is not None:
+                    values = env.values
+                    for value in steps:
+                        values[slot] = value
+                        signal = body(env)
+                        if signal is not None:
+                            if signal is BREAK:
+                                break
+                            if signal is not CONTINUE:
+                                return signal
+                    return None
+
+            while is_truthy(condition(env)):
+                signal = body(env)
+                if signal is not None:
+                    if signal is BREAK:
+                        break
+                    if signal is not CONTINUE:
+                        return signal
+                if increment is not None:
+                    increment(env)
+            return None
+
+        size = stmt.local_count
+        if size == 0:
+            return run_for
+
+        def run_scoped_for(env):
+            return run_for(Frame(size, env))
+
+        return run_scoped_for
+
+    def visit_function_stmt(self, stmt):
+        name = stmt.name.lexeme
+        params = len(stmt.params)
+        size = stmt.local_count
+        escapes = stmt.escapes
+        body = self.__sequence([self.__statement(s) for s in stmt.body])
+
+        if stmt.memoized:
+            memo_size = self.__interpreter.memo_size
+            return self.__define(
+                stmt,
+                lambda env: MemoizedFunction(
+                    CompiledFunction(name, params, size, body, env, escapes),
+                    memo_size,
+                ),
+            )
+
+        return self.__define(
+            stmt, lambda env: CompiledFunction(name, params, size, body, env, escapes)
+        )
+
+    def visit_if_stmt(self, stmt):
+        condition = self.__expr(stmt.condition)
+        then_branch = self.__statement(stmt.then_branch)
+
+        if stmt.else_branch is None:
+
+            def run_if(env):
+                if is_truthy(condition(env)):
+                    return then_branch(env)
+                return None
+
+            return run_if
+
+        else_branch = self.__statement(stmt.else_branch)
+
+        def run_if_else(env):
+            if is_truthy(condition(env)):
+                return then_branch(env)
+            return else_branch(env)
+
+        return run_if_else
+
+    def visit_print_stmt(self, stmt):
+        expression = self.__expr(stmt.expression)
+        stringify = self.__stringify
+
+        def run_print(env):
+            print(stringify(expression(env)))
+
+        return run_print
+
+    def visit_return_stmt(self, stmt):
+        if stmt.value is None:
+            return lambda env: Return(None)
+
+        if stmt.tail_call:
+            callee_of = self.__expr(stmt.value.callee)
+            arguments_of = [self.__expr(argument) for argument in stmt.value.arguments]
+            count = len(arguments_of)
+            call = self.__call(stmt.value.paren)
+
+            def tail_call(env):
+                callee = callee_of(env)
+                arguments = [argument(env) for argument in arguments_of]
+                if type(callee) is CompiledFunction and callee.params == count:
+                    return TailCall(callee, arguments)
+                return Return(call(callee, arguments))
+
+            return tail_call
+
+        value = self.__expr(stmt.value)
+        return lambda env: Return(value(env))
+
+    def visit_var_stmt(self, stmt):
+        if stmt.initializer is None:
+            return self.__define(stmt, lambda env: None)
+        return self.__define(stmt, self.__expr(stmt.initializer))
+
+    def visit_while_stmt(self, stmt):
+        condition = self.__expr(stmt.condition)
+        body = self.__statement(stmt.body)
+
+        def run_while(env):
+            while is_truthy(condition(env)):
+                signal = body(env)
+                if signal is not None:
+                    if signal is BREAK:
+                        break
+                    if signal is not CONTINUE:
+                        return signal
+            return None
+
+        return run_while
+
+    # ------- Expressions ------- #
+
+    def visit_assign_expr(self, expr):
+        value_of = self.__expr(expr.value)
+        depth = expr.depth
+        slot = expr.slot
+
+        if depth is None:
+            name = expr.name
+            assign = self.__globals.assign
+
+            def assign_global(env):
+                value = value_of(env)
+                assign(name, value)
+                return value
+
+            return assign_global
+
+        if depth == 0:
+
+            def assign_local(env):
+                value = env.values[slot] = value_of(env)
+                return value
+
+            return assign_local
+
+        def assign_enclosing(env):
+            value = value_of(env)
+            for _ in range(depth):
+                env = env.enclosing
+            env.values[slot] = value
+            return value
+
+        return assign_enclosing
+
+    def visit_variable_expr(self, expr):
+        depth = expr.depth
+        slot = expr.slot
+
+        if depth is None:
+            name = expr.name
+            get = self.__globals.get
+            return lambda env: get(name)
+        if depth == 0:
+            return lambda env: env.values[slot]
+        if depth == 1:
+            return lambda env: env.enclosing.values[slot]
+
+        def read_enclosing(env):
+            for _ in range(depth):
+                env = env.enclosing
+            return env.values[slot]
+
+        return read_enclosing
+
+    def visit_literal_expr(self, expr):
+        value = expr.value
+        return lambda env: value
+
+    def visit_grouping_expr(self, expr):
+        return self.__expr(expr.expression)
+
+    def visit_logical_expr(self, expr):
+        left = self.__expr(expr.left)
+        right = self.__expr(expr.right)
+
+        if expr.operator.token_type == TokenType.OR:
+
+            def run_or(env):
+                value = left(env)
+                if is_truthy(value):
+                    return value
+                return right(env)
+
+            return run_or
+
+        def run_and(env):
+            value = left(env)
+            if not is_truthy(value):
+                return value
+            return right(env)
+
+        return run_and
+
+    def visit_ternary_expr(self, expr):
+        condition = self.__expr(expr.condition)
+        true_expr = self.__expr(expr.true_expr)
+        false_expr = self.__expr(expr.false_expr)
+
+        def run_ternary(env):
+            if is_truthy(condition(env)):
+                return true_expr(env)
+            return false_expr(env)
+
+        return run_ternary
+
+    def visit_unary_expr(self, expr):
+        right = self.__expr(expr.right)
+        operator = expr.operator
+
+        if operator.token_type == TokenType.MINUS:
+
+            def negate(env):
+                value = right(env)
+                if type(value) is float:
+                    return -value
+                number.check_operand(operator, value)
+                return number.negate(value)
+
+            return negate
+
+        if operator.token_type == TokenType.BANG:
+            return lambda env: not is_truthy(right(env))
+
+        return lambda env: None
+
+    def visit_binary_expr(self, expr):
+        left = self.__expr(expr.left)
+        right = self.__expr(expr.right)
+        operator = expr.operator
+        token_type = operator.token_type
+
+        if token_type == TokenType.PLUS:
+            stringify = self.__stringify
+
+            def add(env):
+                a = left(env)
+                b = right(env)
+                if type(a) is type(b):
+                    if type(a) is float or type(a) is str:
+                        return a + b
+                    if type(a) is int:
+                        value = a + b
+                        if -MAX_EXACT <= value <= MAX_EXACT:
+                            return value
+                        return float(value)
+                elif type(a) is str:
+                    return a + stringify(b) if is_number(b) else None
+                elif type(b) is str:
+                    return stringify(a) + b if is_number(a) else None
+                return number.add(a, b)
+
+            return add
+
+        if token_type == TokenType.MINUS:
+
+            def subtract(env):
+                a = left(env)
+                b = right(env)
+                if type(a) is type(b):
+                    if type(a) is float:
+                        return a - b
+                    if type(a) is int:
+                        value = a - b
+                        if -MAX_EXACT <= value <= MAX_EXACT:
+                            return value
+                        return float(value)
+                return number.subtract(operator, a, b)
+
+            return subtract
+
+        if token_type == TokenType.STAR:
+
+            def multiply(env):
+                a = left(env)
+                b = right(env)
+                if type(a) is float and type(b) is float:
+                    return a * b
+                return number.multiply(operator, a, b)
+
+            return multiply
+
+        if token_type == TokenType.SLASH:
+            return lambda env: number.divide(operator, left(env), right(env))
+
+        comparison = self.comparison_operators.get(token_type)
+        if comparison is None:
+            return lambda env: None
+
+        def compare(env):
+            a = left(env)
+            b = right(env)
+            if type(a) in NUMBER_TYPES and type(b) in NUMBER_TYPES:
+                return comparison(a, b)
+            raise RTE(operator, "Operands must be numbers.")
+
+        return compare
+
+    comparison_operators = {
+        TokenType.GREATER: gt,
+        TokenType.GREATER_EQUAL: ge,
+        TokenType.LESS: lt,
+        TokenType.LESS_EQUAL: le,
+        TokenType.EQUAL_EQUAL: eq,
+        TokenType.BANG_EQUAL: ne,
+    }
+
+    def visit_numeric_expr(self, expr):
+        left = self.__expr(expr.left)
+        right = self.__expr(expr.right)
+        operator = expr.operator
+        token_type = operator.token_type
+
+        # Both operands are known to be numbers, so only the int rules and
+        # division by zero need checking.
+        if token_type == TokenType.PLUS:
+
+            def add(env):
+                value = left(env) + right(env)
+                if type(value) is int and not -MAX_EXACT <= value <= MAX_EXACT:
+                    return float(value)
+                return value
+
+            return add
+
+        if token_type == TokenType.MINUS:
+
+            def subtract(env):
+                value = left(env) - right(env)
+                if type(value) is int and not -MAX_EXACT <= value <= MAX_EXACT:
+                    return float(value)
+                return value
+
+            return subtract
+
+        if token_type == TokenType.STAR:
+            multiply = number.multiply_numbers
+            return lambda env: multiply(left(env), right(env))
+
+        if token_type == TokenType.SLASH:
+
+            def divide(env):
+                a = left(env)
+                b = right(env)
+                if b == 0:
+                    raise RTE(operator, "Cannot divide by zero.")
+                return a / b
+
+            return divide
+
+        comparison = self.comparison_operators[token_type]
+        return lambda env: comparison(left(env), right(env))
+
+    def visit_concat_expr(self, expr):
+        left = self.__expr(expr.left)
+        right = self.__expr(expr.right)
+        return lambda env: left(env) + right(env)
+
+    def visit_call_expr(self, expr):
+        callee_of = self.__expr(expr.callee)
+        arguments_of = [self.__expr(argument) for argument in expr.arguments]
+        count = len(arguments_of)
+        call = self.__call(expr.paren)
+
+        def run_call(env):
+            callee = callee_of(env)
+            arguments = [argument(env) for argument in arguments_of]
+
+            if type(callee) is CompiledFunction and callee.params == count:
+                frames = callee.frames
+                if frames:
+                    frame = frames.pop()
+                else:
+                    frame = Frame(callee.local_count, callee.closure)
+                frame.values[:count] = arguments
+                signal = callee.body(frame)
+                if frames is not None:
+                    frame.values[:] = callee.blank
+                    frames.append(frame)
+                if type(signal) is Return:
+                    return signal.value
+                if type(signal) is TailCall:
+                    return signal.function.call(None, signal.arguments)
+                return None
+
+            return call(callee, arguments)
+
+        return run_call
+
+    def __call(self, paren):
+        """Checked call of any callee, reporting errors at paren."""
+        interpreter = self.__interpreter
+
+        def call(callee, arguments):
+            if not isinstance(callee, MysticCallable):
+                raise RTE(paren, "Can only call functions and classes.")
+
+            if len(arguments) != callee.arity():
+                raise RTE(
+                    paren,
+                    "Expected "
+                    + str(callee.arity())
+                    + " arguments but got "
+                    + str(len(arguments))
+                    + ".",
+                )
+
+            return callee.call(interpreter, arguments)
+
+        return call
+
+
+class ClosureInterpreter(Interpreter):
+    """Interpreter backend that compiles each program to closures first."""
+
+    def __init__(self, mystic):
+        super().__init__(mystic)
+        self.__mystic = mystic
+        self.__compiler = ClosureCompiler(self)
+
+    def is_repl(self):
+        return self.__mystic.is_repl
+
+    def interpret(self, statements):
+        try:
+            self.__compiler.compile(statements)(self.globals)
+        except RTE as e:
+            self.__mystic.runtime_error(e)
@@ -0,0 +1,122 @@
+from expr import Expr
+from stmt import Stmt
+from token_type import TokenType
+from ast_fields import fields
+from mystic_number import MAX_EXACT
+
+
+class CountedLoop:
+    """
+    A for loop of the form `store i = a; i < b; i = i + c`, where c is a
+    whole number literal, b a literal or a local, and the body changes
+    neither i nor b. `<=`, `>` and `>=` may stand for `<` and `-` for `+`, as
+    long as the counter moves towards the bound. Once a and b are known the
+    values i takes are too, so engines can run the loop over a Python range
+    instead of evaluating its condition and increment.
+
+    The counter is never captured, so nothing sees the value it is left
+    with after the last iteration.
+    """
+
+    __slots__ = ("slot", "bound", "step", "comparison")
+
+    def __init__(self, slot, bound, step, comparison):
+        self.slot = slot
+        self.bound = bound
+        self.step = step
+        self.comparison = comparison
+
+    def steps(self, start, bound):
+        """
+        The range of values the counter takes from start, or None unless
+        start and bound are ints the loop can count between exactly.
+        """
+        if type(start) is not int or type(bound) is not int:
+            return None
+        # The increment past the bound has to be exact too, as the condition
+        # tests it.
+        if abs(bound) + abs(self.step) > MAX_EXACT:
+            return None
+        return range(start, bound + self.stops[self.comparison], self.step)
+
+    # Offset from the bound to the first value a range stops before.
+    stops = {
+        TokenType.LESS: 0,
+        TokenType.LESS_EQUAL: 1,
+        TokenType.GREATER: 0,
+        TokenType.GREATER_EQUAL: -1,
+    }
+
+    @classmethod
+    def match(cls, stmt):
+        """The CountedLoop stmt, a Stmt.For, is an instance of, or None."""
+        initializer = stmt.initializer
+        if (
+            type(initializer) is not Stmt.Var
+            or initializer.initializer is None
+            or initializer.slot in stmt.captured
+        ):
+            return None
+        slot = initializer.slot
+
+        condition = stmt.condition
+        if (
+            not cls.__is_binary(condition)
+            or condition.operator.token_type not in cls.stops
+            or not cls.__is_counter(condition.left, slot)
+        ):
+            return None
+        bound = condition.right
+        names = {initializer.name.lexeme}
+        if type(bound) is Expr.Variable:
+            if bound.depth is None or bound.upvalue is not None or bound.cell:
+                return None
+            names.add(bound.name.lexeme)
+        elif type(bound) is not Expr.Literal:
+            return None
+
+        increment = stmt.increment
+        if type(increment) is not Expr.Assign or increment.depth != 0:
+            return None
+        step = increment.value
+        if (
+            increment.slot != slot
+            or not cls.__is_binary(step)
+            or not cls.__is_counter(step.left, slot)
+            or type(step.right) is not Expr.Literal
+            or type(step.right.value) is not int
+        ):
+            return None
+        if step.operator.token_type == TokenType.PLUS:
+            step = step.right.value
+        elif step.operator.token_type == TokenType.MINUS:
+            step = -step.right.value
+        else:
+            return None
+
+        comparison = condition.operator.token_type
+        upward = comparison == TokenType.LESS or comparison == TokenType.LESS_EQUAL
+        if step == 0 or (step > 0) != upward:
+            return None
+        if cls.__assigns(stmt.body, names):
+            return None
+        return cls(slot, bound, step, comparison)
+
+    @staticmethod
+    def __is_binary(expr):
+        return type(expr) is Expr.Binary or type(expr) is Expr.Numeric
+
+    @staticmethod
+    def __is_counter(expr, slot):
+        return type(expr) is Expr.Variable and expr.depth == 0 and expr.slot == slot
+
+    @classmethod
+    def __assigns(cls, node, names):
+        """Whether anything under node assigns a variable called one of names."""
+        if type(node) is list:
+            return any(cls.__assigns(child, names) for child in node)
+        if not hasattr(node, "accept"):
+            return False
+        if type(node) is Expr.Assign and node.name.lexeme in names:
+            return True
+        return any(cls.__assigns(getattr(node, field), names) for field in fields(node))
@@ -1,29 +1,61 @@
+import itertools
 from runtime_error import RTE
 
 
 class Environment:
+    """
+    Name-keyed scope for globals. Each binding lives in a Cell that stays the
+    same for the life of the name, so a site that has found the Cell can keep
+    it for as long as version, which changes whenever a name is first bound,
+    is unchanged.
+    """
+
+    # One counter for every environment, so no two ever share a version.
+    __versions = itertools.count()
+
     def __init__(self, enclosing=None):
         self.__values = {}
         self.__enclosing = enclosing
+        self.version = next(self.__versions)
 
     def define(self, name, value):
-        self.__values[name] = value
+        cell = self.__values.get(name)
+        if cell is None:
+            self.__values[name] = Cell(value)
+            self.version = next(self.__versions)
+        else:
+            cell.value = value
+
+    def __contains__(self, name: str):
+        if name in self.__values:
+            return True
+        return self.__enclosing is not None and name in self.__enclosing
+
+    def cell(self, name):
+        """The Cell holding name's value, raising if name is not defined."""
+        cell = self.__values.get(name.lexeme)
+        if cell is not None:
+            return cell
+
+        if self.__enclosing is not None:
+            return self.__enclosing.cell(name)
+
+        raise RTE(name, f"Undefined variable '{name.lexeme}'.")
 
     def get(self, name):
-        if name.lexeme in self.__values:
-            return self.__values[name.lexeme]
+        cell = self.__values.get(name.lexeme)
+        if cell is not None:
+            return cell.value
 
         if self.__enclosing is not None:
             return self.__enclosing.get(name)
 
         raise RTE(name, f"Undefined variable '{name.lexeme}'.")
 
-    def get_at(self, dist, name):
-        return self.__ancestor(dist).__values[name]
-
     def assign(self, name, value):
-        if name.lexeme in self.__values:
-            self.__values[name.lexeme] = value
+        cell = self.__values.get(name.lexeme)
+        if cell is not None:
+            cell.value = value
             return
 
         if self.__enclosing is not None:
@@ -32,11 +64,36 @@ class Environment:
 
         raise RTE(name, f"Undefined variable '{name.lexeme}'.")
 
-    def assign_at(self, dist, name, value):
-        self.__ancestor(dist).__values[name.lexeme] = value
+
+class Frame:
+    """
+    List-backed local scope. The resolver gives every local a (depth, slot)
+    pair, so reads and writes index into values instead of hashing names.
+    """
+
+    __slots__ = ("values", "enclosing")
+
+    def __init__(self, size, enclosing=None):
+        self.values = [None] * size
+        self.enclosing = enclosing
+
+    def get_at(self, dist, slot):
+        return self.__ancestor(dist).values[slot]
+
+    def assign_at(self, dist, slot, value):
+        self.__ancestor(dist).values[slot] = value
 
     def __ancestor(self, dist):
         env = self
         for i in range(dist):
-            env = env.__enclosing
+            env = env.enclosing
         return env
+
+
+class Cell:
+    """Box for a local that nested functions capture, shared by reference."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value=None):
+        self.value = value
@@ -2,43 +2,57 @@ class Expr:
     class Visitor:
         def visit_assign_expr(self, expr):
             pass
+
         def visit_ternary_expr(self, expr):
             pass
+
         def visit_binary_expr(self, expr):
             pass
+
         def visit_call_expr(self, expr):
             pass
+
         def visit_grouping_expr(self, expr):
             pass
+
         def visit_literal_expr(self, expr):
             pass
+
         def visit_logical_expr(self, expr):
             pass
+
         def visit_unary_expr(self, expr):
             pass
+
         def visit_variable_expr(self, expr):
             pass
-    def __init__(self):
-        self._assign = self.Assign
-        self._ternary = self.Ternary
-        self._binary = self.Binary
-        self._call = self.Call
-        self._grouping = self.Grouping
-        self._literal = self.Literal
-        self._logical = self.Logical
-        self._unary = self.Unary
-        self._variable = self.Variable
+
+        def visit_numeric_expr(self, expr):
+            pass
+
+        def visit_concat_expr(self, expr):
+            pass
 
     class Assign:
-        def __init__(self, name, value, ):
+        __slots__ = ("name", "value", "depth", "slot", "upvalue", "cell", "version", "binding")
+
+        def __init__(self, name, value):
             self.name = name
             self.value = value
+            self.depth = None
+            self.slot = None
+            self.upvalue = None
+            self.cell = None
+            self.version = None
+            self.binding = None
 
         def accept(self, visitor):
             return visitor.visit_assign_expr(self)
 
     class Ternary:
-        def __init__(self, condition, true_expr, false_expr, ):
+        __slots__ = ("condition", "true_expr", "false_expr")
+
+        def __init__(self, condition, true_expr, false_expr):
             self.condition = condition
             self.true_expr = true_expr
             self.false_expr = false_expr
@@ -47,58 +61,105 @@ class Expr:
             return visitor.visit_ternary_expr(self)
 
     class Binary:
-        def __init__(self, left, operator, right, ):
+        __slots__ = ("left", "operator", "right", "handler")
+
+        def __init__(self, left, operator, right):
             self.left = left
             self.operator = operator
             self.right = right
+            self.handler = None
 
         def accept(self, visitor):
             return visitor.visit_binary_expr(self)
 
     class Call:
-        def __init__(self, callee, paren, arguments, ):
+        __slots__ = ("callee", "paren", "arguments", "target")
+
+        def __init__(self, callee, paren, arguments):
             self.callee = callee
             self.paren = paren
             self.arguments = arguments
+            self.target = None
 
         def accept(self, visitor):
             return visitor.visit_call_expr(self)
 
     class Grouping:
-        def __init__(self, expression, ):
+        __slots__ = ("expression",)
+
+        def __init__(self, expression):
             self.expression = expression
 
         def accept(self, visitor):
             return visitor.visit_grouping_expr(self)
 
     class Literal:
-        def __init__(self, value, ):
+        __slots__ = ("value",)
+
+        def __init__(self, value):
             self.value = value
 
         def accept(self, visitor):
             return visitor.visit_literal_expr(self)
 
     class Logical:
-        def __init__(self, left, operator, right, ):
+        __slots__ = ("left", "operator", "right", "handler")
+
+        def __init__(self, left, operator, right):
             self.left = left
             self.operator = operator
             self.right = right
+            self.handler = None
 
         def accept(self, visitor):
             return visitor.visit_logical_expr(self)
 
     class Unary:
-        def __init__(self, operator, right, ):
+        __slots__ = ("operator", "right", "handler")
+
+        def __init__(self, operator, right):
             self.operator = operator
             self.right = right
+            self.handler = None
 
         def accept(self, visitor):
             return visitor.visit_unary_expr(self)
 
     class Variable:
-        def __init__(self, name, ):
+        __slots__ = ("name", "depth", "slot", "upvalue", "cell", "version", "binding")
+
+        def __init__(self, name):
             self.name = name
+            self.depth = None
+            self.slot = None
+            self.upvalue = None
+            self.cell = None
+            self.version = None
+            self.binding = None
 
         def accept(self, visitor):
             return visitor.visit_variable_expr(self)
 
+    class Numeric:
+        __slots__ = ("left", "operator", "right", "handler")
+
+        def __init__(self, left, operator, right):
+            self.left = left
+            self.operator = operator
+            self.right = right
+            self.handler = None
+
+        def accept(self, visitor):
+            return visitor.visit_numeric_expr(self)
+
+    class Concat:
+        __slots__ = ("left", "operator", "right")
+
+        def __init__(self, left, operator, right):
+            self.left = left
+            self.operator = operator
+            self.right = right
+
+        def accept(self, visitor):
+            return visitor.visit_concat_expr(self)
+
@@ -0,0 +1,561 @@
+import math
+from expr import Expr
+from stmt import Stmt
+from token_type import TokenType
+import mystic_number as number
+from mystic_number import MAX_EXACT
+from mystic_return import Return
+
+# Returned by a compiled loop whose entry guards fail. Nothing has run yet,
+# so the interpreter takes the loop over from the same iteration.
+DEOPT = object()
+
+# Static kinds of the values in a compiled loop. The join of two kinds is the
+# larger one.
+FLOAT = 0
+NUMBER = 1
+ANY = 2
+
+
+class LoopCompiler(Expr.Visitor, Stmt.Visitor):
+    """
+    Translates one while or for loop into the source of a Python function
+    `_loop(env, cells)` that runs it to completion from the loop's frame.
+
+    Locals that no function captures cannot change behind the loop's back,
+    so the ones it uses from enclosing frames are loaded into Python locals
+    on entry and written back on exit, and the ones it declares never leave
+    Python locals. Each gets a kind: FLOAT or NUMBER while every value the
+    loop can give it is one, starting from the value it held on entry. Entry
+    guards check those starting values, and arithmetic on operands of known
+    kind is emitted without the interpreter's type checks.
+    """
+
+    class Unsupported(Exception):
+        pass
+
+    def __init__(self, handlers, echo: bool = False):
+        self.__binary_handlers, self.__unary_handlers = handlers
+        self.__echo = echo
+        self.__constants = {}
+        self.__kinds = {}
+        self.__blocks = {}
+
+    def compile(self, stmt, env):
+        """Return the generated source and the constants it refers to."""
+        self.__env = env
+        self.__root = stmt
+        # Generate until a pass leaves every kind as it found it, so the
+        # last pass was generated with the final kinds.
+        while True:
+            kinds = dict(self.__kinds)
+            self.__lines = []
+            self.__indent = 2
+            self.__temps = 0
+            self.__scopes = []
+            # Increment of each loop being generated and the number of
+            # scopes open around it, or None for whiles.
+            self.__increments = []
+            self.__frames = set()
+            self.__outer = {}
+            self.__stored = set()
+            self.__statement(stmt)
+            if kinds == self.__kinds:
+                break
+
+        lines = ["def _loop(env, cells):"]
+        for depth in sorted(self.__frames):
+            lines.append(f"    f{depth} = env{'.enclosing' * depth}.values")
+        for (depth, slot), name in self.__outer.items():
+            lines.append(f"    {name} = f{depth}[{slot}]")
+            kind = self.__kinds[depth, slot]
+            if kind == FLOAT:
+                lines.append(f"    if type({name}) is not float:")
+                lines.append("        return DEOPT")
+            elif kind == NUMBER:
+                lines.append(
+                    f"    if type({name}) is not float and type({name}) is not int:"
+                )
+                lines.append("        return DEOPT")
+        lines.append("    try:")
+        lines.extend(self.__lines)
+        lines.append("    finally:")
+        for depth, slot in sorted(self.__stored):
+            lines.append(f"        f{depth}[{slot}] = {self.__outer[depth, slot]}")
+        if not self.__stored:
+            lines.append("        pass")
+        lines.append("    return None")
+        return "\n".join(lines) + "\n", self.__constants
+
+    # ------- Helper Functions ------- #
+
+    def __statement(self, stmt):
+        stmt.accept(self)
+
+    def __expr(self, expr):
+        return expr.accept(self)
+
+    def __emit(self, line):
+        self.__lines.append("    " * self.__indent + line)
+
+    def __body(self, stmt):
+        """Emit stmt as an indented suite, which Python needs to be non-empty."""
+        self.__indent += 1
+        start = len(self.__lines)
+        self.__statement(stmt)
+        if len(self.__lines) == start:
+            self.__emit("pass")
+        self.__indent -= 1
+
+    def __constant(self, value):
+        name = f"_k{len(self.__constants)}"
+        self.__constants[name] = value
+        return name
+
+    def __temp(self):
+        self.__temps += 1
+        return f"_t{self.__temps}"
+
+    def __truthy(self, name, value):
+        """Inline Mystic truthiness of value, kept in the temporary name."""
+        return (
+            f"(({name} := {value}) is True or {name} is not False"
+            f' and {name} is not None and {name} != 0 and {name} != "")'
+        )
+
+    def __condition(self, expr):
+        # Comparisons and `!` already produce a bool.
+        kind = type(expr)
+        if kind is Expr.Binary or kind is Expr.Numeric:
+            if expr.operator.token_type in self.comparisons:
+                return self.__expr(expr)
+        elif kind is Expr.Unary and expr.operator.token_type == TokenType.BANG:
+            return self.__expr(expr)
+        return self.__truthy(self.__temp(), self.__expr(expr))
+
+    def __local(self, depth, slot):
+        """Key and Python name of the uncaptured local at (depth, slot)."""
+        scopes = self.__scopes
+        if depth < len(scopes):
+            block = scopes[-1 - depth]
+            index = self.__blocks.setdefault(block, len(self.__blocks))
+            return (block, slot), f"b{index}_{slot}"
+
+        key = (depth - len(scopes), slot)
+        name = self.__outer.get(key)
+        if name is None:
+            name = self.__outer[key] = f"o{key[0]}_{slot}"
+            self.__frames.add(key[0])
+            if key not in self.__kinds:
+                self.__kinds[key] = self.__kind_of(self.__env.get_at(*key))
+        return key, name
+
+    def __frame(self, depth):
+        """Python name of the values of the frame at depth, outside the loop."""
+        if depth < len(self.__scopes):
+            raise self.Unsupported()
+        depth -= len(self.__scopes)
+        self.__frames.add(depth)
+        return f"f{depth}"
+
+    def __store(self, key, kind):
+        self.__kinds[key] = max(self.__kinds.get(key, FLOAT), kind)
+        if type(key[0]) is int:
+            self.__stored.add(key)
+
+    def __kind_of(self, value):
+        if type(value) is float:
+            return FLOAT
+        if type(value) is int:
+            return NUMBER
+        return ANY
+
+    def __kind(self, expr):
+        """Static kind of expr's value under the current kinds."""
+        kind = type(expr)
+        if kind is Expr.Literal:
+            return self.__kind_of(expr.value)
+        if kind is Expr.Grouping:
+            return self.__kind(expr.expression)
+        if kind is Expr.Assign:
+            return self.__kind(expr.value)
+        if kind is Expr.Variable:
+            if expr.depth is None or expr.upvalue is not None or expr.cell:
+                return ANY
+            key, _ = self.__local(expr.depth, expr.slot)
+            return self.__kinds.get(key, FLOAT)
+        if kind is Expr.Ternary:
+            return max(self.__kind(expr.true_expr), self.__kind(expr.false_expr))
+        if kind is Expr.Unary:
+            if expr.operator.token_type == TokenType.MINUS:
+                return self.__kind(expr.right)
+            return ANY
+        if kind is Expr.Binary or kind is Expr.Numeric:
+            token_type = expr.operator.token_type
+            if token_type not in self.arithmetic:
+                return ANY
+            left, right = self.__operand_kinds(expr)
+            if left == ANY or right == ANY:
+                return ANY
+            if token_type == TokenType.SLASH:
+                return FLOAT
+            return min(left, right)
+        return ANY
+
+    def __simple(self, expr):
+        """Whether evaluating expr can have no side effects."""
+        while type(expr) is Expr.Grouping:
+            expr = expr.expression
+        return type(expr) is Expr.Literal or type(expr) is Expr.Variable
+
+    # ------- Statements ------- #
+
+    def visit_block_stmt(self, stmt):
+        if stmt.local_count == 0:
+            for statement in stmt.statements:
+                self.__statement(statement)
+            return
+
+        self.__scopes.append(stmt)
+        for statement in stmt.statements:
+            self.__statement(statement)
+        self.__scopes.pop()
+
+    def visit_break_stmt(self, stmt):
+        self.__emit("break")
+
+    def visit_continue_stmt(self, stmt):
+        # A for loop's increment still runs before its next iteration, in
+        # the loop's scope rather than that of the blocks continue is in.
+        loop = self.__increments[-1]
+        if loop is not None:
+            increment, depth = loop
+            scopes = self.__scopes
+            self.__scopes = scopes[:depth]
+            self.__emit(self.__expr(increment))
+            self.__scopes = scopes
+        self.__emit("continue")
+
+    def visit_expression_stmt(self, stmt):
+        value = self.__expr(stmt.expression)
+        if self.__echo:
+            self.__emit(f"print(stringify({value}))")
+        else:
+            self.__emit(value)
+
+    def visit_function_stmt(self, stmt):
+        # A closure made here would capture the loop's locals.
+        raise self.Unsupported()
+
+    def visit_if_stmt(self, stmt):
+        self.__emit(f"if {self.__condition(stmt.condition)}:")
+        self.__body(stmt.then_branch)
+        if stmt.else_branch is not None:
+            self.__emit("else:")
+            self.__body(stmt.else_branch)
+
+    def visit_print_stmt(self, stmt):
+        self.__emit(f"print(stringify({self.__expr(stmt.expression)}))")
+
+    def visit_return_stmt(self, stmt):
+        if stmt.value is None:
+            self.__emit("return Return(None)")
+        elif stmt.tail_call:
+            call = stmt.value
+            self.__emit(
+                f"return tail_call({self.__constant(call)},"
+                f" {self.__expr(call.callee)}, [{self.__arguments(call)}])"
+            )
+        else:
+            self.__emit(f"return Return({self.__expr(stmt.value)})")
+
+    def visit_var_stmt(self, stmt):
+        if stmt.slot is None or stmt.cell or not self.__scopes:
+            raise self.Unsupported()
+        key, name = self.__local(0, stmt.slot)
+        if stmt.initializer is None:
+            self.__store(key, ANY)
+            self.__emit(f"{name} = None")
+        else:
+            self.__store(key, self.__kind(stmt.initializer))
+            self.__emit(f"{name} = {self.__expr(stmt.initializer)}")
+
+    def visit_while_stmt(self, stmt):
+        self.__emit(f"while {self.__condition(stmt.condition)}:")
+        self.__increments.append(None)
+        self.__body(stmt.body)
+        self.__increments.pop()
+
+    def visit_for_stmt(self, stmt):
+        # The loop being compiled already ran its initializer in the frame
+        # it is handed, while nested ones run theirs in Python locals.
+        nested = stmt is not self.__root
+        if nested and stmt.local_count != 0:
+            self.__scopes.append(stmt)
+        if nested and stmt.initializer is not None:
+            self.__statement(stmt.initializer)
+
+        self.__emit(f"while {self.__condition(stmt.condition)}:")
+        if stmt.increment is None:
+            self.__increments.append(None)
+        else:
+            self.__increments.append((stmt.increment, len(self.__scopes)))
+        self.__indent += 1
+        start = len(self.__lines)
+        self.__statement(stmt.body)
+        if stmt.increment is not None:
+            self.__emit(self.__expr(stmt.increment))
+        elif len(self.__lines) == start:
+            self.__emit("pass")
+        self.__indent -= 1
+        self.__increments.pop()
+
+        if nested and stmt.local_count != 0:
+            self.__scopes.pop()
+
+    # ------- Expressions ------- #
+
+    def visit_assign_expr(self, expr):
+        value = self.__expr(expr.value)
+        if expr.depth is None:
+            return f"assign_global({self.__constant(expr.name)}, {value})"
+        if expr.upvalue is not None:
+            return f"set_cell(cells[{expr.upvalue}], {value})"
+        if expr.cell:
+            return f"set_cell({self.__frame(expr.depth)}[{expr.slot}], {value})"
+
+        key, name = self.__local(expr.depth, expr.slot)
+        self.__store(key, self.__kind(expr.value))
+        return f"({name} := {value})"
+
+    def visit_variable_expr(self, expr):
+        if expr.depth is None:
+            return f"get_global({self.__constant(expr.name)})"
+        if expr.upvalue is not None:
+            return f"cells[{expr.upvalue}].value"
+        if expr.cell:
+            return f"{self.__frame(expr.depth)}[{expr.slot}].value"
+
+        _, name = self.__local(expr.depth, expr.slot)
+        return name
+
+    def visit_literal_expr(self, expr):
+        value = expr.value
+        if type(value) is float and math.isfinite(value) or type(value) is int:
+            return repr(value)
+        return self.__constant(value)
+
+    def visit_grouping_expr(self, expr):
+        return f"({self.__expr(expr.expression)})"
+
+    def visit_logical_expr(self, expr):
+        left = self.__expr(expr.left)
+        right = self.__expr(expr.right)
+        value = self.__temp()
+        truthy = self.__truthy(value, left)
+
+        if expr.operator.token_type == TokenType.OR:
+            return f"({value} if {truthy} else {right})"
+        return f"({right} if {truthy} else {value})"
+
+    def visit_ternary_expr(self, expr):
+        condition = self.__condition(expr.condition)
+        return (
+            f"({self.__expr(expr.true_expr)} if {condition}"
+            f" else {self.__expr(expr.false_expr)})"
+        )
+
+    def visit_unary_expr(self, expr):
+        right = self.__expr(expr.right)
+        token_type = expr.operator.token_type
+
+        if token_type == TokenType.BANG:
+            return f"(not {self.__truthy(self.__temp(), right)})"
+
+        kind = self.__kind(expr.right)
+        if token_type == TokenType.MINUS and kind == FLOAT:
+            return f"(-{right})"
+        if token_type == TokenType.MINUS and kind == NUMBER:
+            return f"negate({right})"
+
+        handler = self.__unary_handlers.get(token_type)
+        if handler is None:
+            raise self.Unsupported()
+        return (
+            f"{self.__constant(handler)}(interpreter,"
+            f" {self.__constant(expr.operator)}, {right})"
+        )
+
+    def __operand_kinds(self, expr):
+        left = self.__kind(expr.left)
+        right = self.__kind(expr.right)
+        # Type inference proved a Numeric node's operands are numbers.
+        if type(expr) is Expr.Numeric:
+            return min(left, NUMBER), min(right, NUMBER)
+        return left, right
+
+    def visit_binary_expr(self, expr):
+        left = self.__expr(expr.left)
+        right = self.__expr(expr.right)
+        token_type = expr.operator.token_type
+        left_kind, right_kind = self.__operand_kinds(expr)
+
+        if left_kind != ANY and right_kind != ANY:
+            operator = self.comparisons.get(token_type)
+            if operator is not None:
+                return f"({left} {operator} {right})"
+
+            token = self.__constant(expr.operator)
+            if token_type == TokenType.SLASH:
+                if not self.__simple(expr.left):
+                    return f"divide({token}, {left}, {right})"
+                divisor = self.__temp()
+                return (
+                    f"({left} / {divisor} if ({divisor} := {right})"
+                    f" else divide({token}, {left}, {divisor}))"
+                )
+
+            operator = self.arithmetic[token_type]
+            # A float operand makes the result a float, which needs no checks.
+            if left_kind == FLOAT or right_kind == FLOAT:
+                return f"({left} {operator} {right})"
+            if token_type == TokenType.STAR:
+                return f"multiply({token}, {left}, {right})"
+            value = self.__temp()
+            return (
+                f"({value} if type({value} := {left} {operator} {right}) is float"
+                f" or -{MAX_EXACT} <= {value} <= {MAX_EXACT} else float({value}))"
+            )
+
+        handler = self.__binary_handlers.get(token_type)
+        if handler is None:
+            raise self.Unsupported()
+        return (
+            f"{self.__constant(handler)}(interpreter,"
+            f" {self.__constant(expr.operator)}, {left}, {right})"
+        )
+
+    arithmetic = {
+        TokenType.PLUS: "+",
+        TokenType.MINUS: "-",
+        TokenType.STAR: "*",
+        TokenType.SLASH: "/",
+    }
+
+    comparisons = {
+        TokenType.GREATER: ">",
+        TokenType.GREATER_EQUAL: ">=",
+        TokenType.LESS: "<",
+        TokenType.LESS_EQUAL: "<=",
+        TokenType.EQUAL_EQUAL: "==",
+        TokenType.BANG_EQUAL: "!=",
+    }
+
+    visit_numeric_expr = visit_binary_expr
+
+    def visit_concat_expr(self, expr):
+        return f"({self.__expr(expr.left)} + {self.__expr(expr.right)})"
+
+    def visit_call_expr(self, expr):
+        callee = self.__expr(expr.callee)
+        return f"call({self.__constant(expr)}, {callee}, [{self.__arguments(expr)}])"
+
+    def __arguments(self, expr):
+        return ", ".join(self.__expr(argument) for argument in expr.arguments)
+
+
+class LoopJit:
+    """
+    Second tier for the tree-walker's while and for loops. The interpreter counts
+    the iterations of each loop, and once one has run `threshold` of them it
+    is compiled to a Python function that runs from then on. Both the count
+    and the compiled function live on the loop's node, so they go away with
+    the program, such as a REPL line, that holds it. Counters record
+    how many loops were compiled, how many could not be, and how often a
+    compiled loop found its guards failing and went back to the interpreter.
+    """
+
+    def __init__(self, interpreter, mystic, threshold: int):
+        self.threshold = threshold
+        self.compiled = 0
+        self.rejected = 0
+        self.deopts = 0
+        self.__interpreter = interpreter
+        self.__mystic = mystic
+        self.__runtime = self.__make_runtime()
+
+    def iterations(self, stmt):
+        return stmt.iterations or 0
+
+    def count(self, stmt, iterations):
+        stmt.iterations = iterations
+
+    def loop(self, stmt, env):
+        """
+        The compiled function for stmt, compiling it now if it is hot, or
+        None while it should be interpreted.
+        """
+        # A loop that cannot be compiled keeps False instead.
+        compiled = stmt.compiled
+        if compiled is not None:
+            return compiled or None
+        if (stmt.iterations or 0) < self.threshold:
+            return None
+
+        interpreter = self.__interpreter
+        compiler = LoopCompiler(
+            (interpreter.binary_handlers, interpreter.unary_handlers),
+            self.__mystic.is_repl,
+        )
+        try:
+            source, constants = compiler.compile(stmt, env)
+        except LoopCompiler.Unsupported:
+            self.rejected += 1
+            stmt.compiled = False
+            return None
+
+        namespace = dict(self.__runtime)
+        namespace.update(constants)
+        exec(compile(source, "<mystic loop>", "exec"), namespace)
+        self.compiled += 1
+        loop = stmt.compiled = namespace["_loop"]
+        return loop
+
+    def deoptimize(self, stmt):
+        """Send stmt back to the interpreter to be profiled and compiled anew."""
+        self.deopts += 1
+        stmt.compiled = None
+        stmt.iterations = 0
+
+    def __make_runtime(self):
+        interpreter = self.__interpreter
+        globals = interpreter.globals
+
+        def assign_global(name, value):
+            globals.assign(name, value)
+            return value
+
+        def set_cell(cell, value):
+            cell.value = value
+            return value
+
+        return {
+            "__builtins__": {
+                "print": print,
+                "type": type,
+                "float": float,
+                "int": int,
+            },
+            "DEOPT": DEOPT,
+            "Return": Return,
+            "interpreter": interpreter,
+            "stringify": interpreter._stringify,
+            "get_global": globals.get,
+            "assign_global": assign_global,
+            "set_cell": set_cell,
+            "negate": number.negate,
+            "multiply": number.multiply,
+            "divide": number.divide,
+            "call": interpreter._call,
+            "tail_call": interpreter._tail_call,
+        }
@@ -1,25 +1,40 @@
 import sys
-from scanner import Scanner
+from regex_scanner import RegexScanner
 from mystic_parser import MysticParser
 from ast_printer import AstPrinter
 from mystic_interpreter import Interpreter
+from closure_compiler import ClosureInterpreter
+from mystic_vm import VMInterpreter
+from python_transpiler import PythonInterpreter
 from runtime_error import RTE
 from token_type import *
 from mystic_token import Token
 from resolver import Resolver
+from optimizer import Optimizer
+from type_inference import TypeInference
+from ast_cache import AstCache
 
 
 class Mystic:
-    def __init__(self):
+    engines = {
+        "tree": Interpreter,
+        "closure": ClosureInterpreter,
+        "vm": VMInterpreter,
+        "python": PythonInterpreter,
+    }
+
+    def __init__(self, engine: str = "tree"):
         self.__had_error = False
         self.__had_runtime_error = False
-        self.interpreter = Interpreter(self)
+        self.interpreter = self.engines[engine](self)
         self.is_repl = False
 
     def __run_file(self, path: str) -> None:
         with open(path, "rb") as file:
             bytes = file.read()
-            self.__run(bytes.decode())
+            self.__run(
+                bytes.decode(), AstCache(path, self.interpreter.cache_suffix)
+            )
             if self.__had_error:
                 sys.exit(65)
             if self.__had_runtime_error:
@@ -38,11 +53,14 @@ class Mystic:
             except EOFError:
                 break
 
-    def __run(self, source: str):
-        scanner = Scanner(source, self)
-        tokens = scanner.scan_tokens()
+    def __run(self, source: str, cache: AstCache = None):
+        program = cache.load(source) if cache is not None else None
+        if program is not None:
+            self.interpreter.interpret(program)
+            return
 
-        parser = MysticParser(tokens, self)
+        scanner = RegexScanner(source, self)
+        parser = MysticParser(scanner.tokens(), self)
         statements = parser.parse()
 
         if self.__had_error:
@@ -54,7 +72,15 @@ class Mystic:
         if self.__had_error:
             return
 
-        self.interpreter.interpret(statements)
+        statements = Optimizer(self.interpreter).optimize(statements)
+        statements = TypeInference(self.interpreter, self.is_repl).specialize(
+            statements
+        )
+        program = self.interpreter.prepare(statements)
+        if cache is not None:
+            cache.store(source, program)
+
+        self.interpreter.interpret(program)
 
     def __report(self, line: int, where: str, message: str):
         print("[line " + str(line) + "] Error" + where + ": " + message)
@@ -74,13 +100,32 @@ class Mystic:
         self.__had_runtime_error = True
 
     def main(self):
-        args = sys.argv
-
-        if len(args) > 2:
-            print("Usage: python mystic.py [filename]")
+        args = sys.argv[1:]
+
+        engine = "tree"
+        jit = True
+        while len(args) > 0 and args[0].startswith("--"):
+            option = args.pop(0)
+            if option.startswith("--engine="):
+                engine = option[len("--engine=") :]
+            elif option == "--no-jit":
+                jit = False
+            else:
+                engine = None
+
+        if len(args) > 1 or engine not in self.engines:
+            print(
+                "Usage: python mystic.py [--engine="
+                + "|".join(self.engines)
+                + "] [--no-jit] [filename]"
+            )
             sys.exit(64)
-        elif len(args) == 2:
-            self.__run_file(args[1])
+
+        self.interpreter = self.engines[engine](self)
+        if not jit:
+            self.interpreter.jit = None
+        if len(args) == 1:
+            self.__run_file(args[0])
         else:
             self.__run_prompt()
 
@@ -0,0 +1,447 @@
+from array import array
+from expr import Expr
+from stmt import Stmt
+from token_type import TokenType
+
+
+class OpCode:
+    CONSTANT = 0  # constant index
+    NIL = 1
+    TRUE = 2
+    FALSE = 3
+    POP = 4
+    GET_LOCAL = 5  # slot
+    SET_LOCAL = 6  # slot
+    STORE_LOCAL = 7  # slot, pops the value
+    GET_CELL = 8  # slot holding a Cell
+    SET_CELL = 9  # slot holding a Cell
+    DEFINE_CELL = 10  # slot, pops the value into a fresh Cell
+    NEW_CELL = 11  # slot, stores an empty Cell
+    BOX = 12  # slot, wraps the current value in a Cell
+    GET_UPVALUE = 13  # upvalue index
+    SET_UPVALUE = 14  # upvalue index
+    GET_GLOBAL = 15  # constant index of the name token
+    SET_GLOBAL = 16  # constant index of the name token
+    DEFINE_GLOBAL = 17  # constant index of the name token
+    ADD = 18
+    SUBTRACT = 19
+    MULTIPLY = 20
+    DIVIDE = 21
+    GREATER = 22
+    GREATER_EQUAL = 23
+    LESS = 24
+    LESS_EQUAL = 25
+    EQUAL = 26
+    NOT_EQUAL = 27
+    NEGATE = 28
+    NOT = 29
+    PRINT = 30
+    ECHO = 31
+    JUMP = 32  # target
+    JUMP_IF_FALSE = 33  # target, pops the condition
+    JUMP_IF_FALSE_OR_POP = 34  # target
+    JUMP_IF_TRUE_OR_POP = 35  # target
+    CALL = 36  # argument count
+    CLOSURE = 37  # constant index of the FunctionProto
+    RETURN = 38
+
+    operands = {
+        CONSTANT: 1,
+        GET_LOCAL: 1,
+        SET_LOCAL: 1,
+        STORE_LOCAL: 1,
+        GET_CELL: 1,
+        SET_CELL: 1,
+        DEFINE_CELL: 1,
+        NEW_CELL: 1,
+        BOX: 1,
+        GET_UPVALUE: 1,
+        SET_UPVALUE: 1,
+        GET_GLOBAL: 1,
+        SET_GLOBAL: 1,
+        DEFINE_GLOBAL: 1,
+        JUMP: 1,
+        JUMP_IF_FALSE: 1,
+        JUMP_IF_FALSE_OR_POP: 1,
+        JUMP_IF_TRUE_OR_POP: 1,
+        CALL: 1,
+        CLOSURE: 1,
+    }
+
+
+class FunctionProto:
+    """
+    Compiled function body: flat instruction array, constant pool, number of
+    local slots and where each upvalue comes from when a closure is made.
+    tokens maps an instruction offset to the token reported if it fails.
+    """
+
+    __slots__ = (
+        "name",
+        "arity",
+        "local_count",
+        "code",
+        "constants",
+        "tokens",
+        "upvalues",
+        "memoized",
+    )
+
+    def __init__(self, name, arity, memoized=False):
+        self.name = name
+        self.arity = arity
+        self.memoized = memoized
+        self.local_count = 0
+        self.code = array("I")
+        self.constants = []
+        self.tokens = {}
+        # (is_local, index): a cell slot of the enclosing function or one of
+        # its own upvalues.
+        self.upvalues = []
+
+
+class BytecodeCompiler(Expr.Visitor, Stmt.Visitor):
+    """
+    Compiles resolved statements to FunctionProto bytecode. The resolver's
+    per-scope (depth, slot) pairs are flattened into one slot range per
+    function; locals that nested functions capture live in Cells and are
+    reached from inside those functions as upvalues.
+    """
+
+    binary_opcodes = {
+        TokenType.PLUS: OpCode.ADD,
+        TokenType.MINUS: OpCode.SUBTRACT,
+        TokenType.STAR: OpCode.MULTIPLY,
+        TokenType.SLASH: OpCode.DIVIDE,
+        TokenType.GREATER: OpCode.GREATER,
+        TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+        TokenType.LESS: OpCode.LESS,
+        TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+        TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+        TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+    }
+
+    class FunctionState:
+        def __init__(self, proto, enclosing):
+            self.proto = proto
+            self.enclosing = enclosing
+            # (base slot, captured slots) for every open resolver scope.
+            self.scopes = []
+            self.next_slot = 0
+            self.constants = {}
+            self.upvalues = {}
+            # (continue target, break jumps) per enclosing loop.
+            self.loops = []
+
+    def __init__(self, echo: bool = False):
+        self.__echo = echo
+        self.__function = None
+
+    def compile(self, statements) -> FunctionProto:
+        self.__function = self.FunctionState(FunctionProto("script", 0), None)
+        for statement in statements:
+            self.__statement(statement)
+        self.__emit(OpCode.NIL)
+        self.__emit(OpCode.RETURN)
+        return self.__function.proto
+
+    # ------- Helper Functions ------- #
+
+    def __statement(self, stmt):
+        stmt.accept(self)
+
+    def __expr(self, expr):
+        expr.accept(self)
+
+    def __emit(self, op, operand=None, token=None):
+        code = self.__function.proto.code
+        if token is not None:
+            self.__function.proto.tokens[len(code)] = token
+        code.append(op)
+        if operand is not None:
+            code.append(operand)
+        return len(code) - 1
+
+    def __emit_jump(self, op):
+        return self.__emit(op, 0)
+
+    def __patch_jump(self, operand_offset):
+        self.__function.proto.code[operand_offset] = len(self.__function.proto.code)
+
+    def __constant(self, value):
+        # Keyed by repr as well, since -0.0 == 0.0 but prints differently.
+        key = (type(value), value, repr(value))
+        constants = self.__function.constants
+        if key not in constants:
+            constants[key] = len(self.__function.proto.constants)
+            self.__function.proto.constants.append(value)
+        return constants[key]
+
+    def __object_constant(self, value):
+        self.__function.proto.constants.append(value)
+        return len(self.__function.proto.constants) - 1
+
+    def __begin_scope(self, size, captured):
+        function = self.__function
+        base = function.next_slot
+        function.scopes.append((base, captured))
+        function.next_slot += size
+        proto = function.proto
+        proto.local_count = max(proto.local_count, function.next_slot)
+        return base
+
+    def __end_scope(self):
+        base, _ = self.__function.scopes.pop()
+        self.__function.next_slot = base
+
+    def __local(self, function, depth, slot):
+        """Flat slot and captured flag for a scope of function, or None."""
+        if depth >= len(function.scopes):
+            return None
+        base, captured = function.scopes[-1 - depth]
+        return base + slot, slot in captured
+
+    def __upvalue(self, function, depth, slot):
+        """Index of the upvalue of function reaching (depth, slot) outside it."""
+        depth -= len(function.scopes)
+        enclosing = function.enclosing
+        local = self.__local(enclosing, depth, slot)
+        if local is not None:
+            key = (True, local[0])
+        else:
+            key = (False, self.__upvalue(enclosing, depth, slot))
+
+        if key not in function.upvalues:
+            function.upvalues[key] = len(function.proto.upvalues)
+            function.proto.upvalues.append(key)
+        return function.upvalues[key]
+
+    def __variable(self, expr, get: bool):
+        if expr.depth is None:
+            op = OpCode.GET_GLOBAL if get else OpCode.SET_GLOBAL
+            self.__emit(op, self.__object_constant(expr.name), expr.name)
+            return
+
+        local = self.__local(self.__function, expr.depth, expr.slot)
+        if local is None:
+            op = OpCode.GET_UPVALUE if get else OpCode.SET_UPVALUE
+            self.__emit(op, self.__upvalue(self.__function, expr.depth, expr.slot))
+        elif local[1]:
+            self.__emit(OpCode.GET_CELL if get else OpCode.SET_CELL, local[0])
+        else:
+            self.__emit(OpCode.GET_LOCAL if get else OpCode.SET_LOCAL, local[0])
+
+    def __define(self, stmt):
+        """Store the value on top of the stack in the variable stmt declares."""
+        if stmt.slot is None:
+            name = self.__object_constant(stmt.name)
+            self.__emit(OpCode.DEFINE_GLOBAL, name, stmt.name)
+            return
+
+        base, captured = self.__function.scopes[-1]
+        if stmt.slot in captured:
+            self.__emit(OpCode.DEFINE_CELL, base + stmt.slot)
+        else:
+            self.__emit(OpCode.STORE_LOCAL, base + stmt.slot)
+
+    # ------- Statements ------- #
+
+    def visit_block_stmt(self, stmt):
+        if stmt.local_count == 0:
+            for statement in stmt.statements:
+                self.__statement(statement)
+            return
+
+        self.__begin_scope(stmt.local_count, stmt.captured)
+        for statement in stmt.statements:
+            self.__statement(statement)
+        self.__end_scope()
+
+    def visit_break_stmt(self, stmt):
+        self.__function.loops[-1][1].append(self.__emit_jump(OpCode.JUMP))
+
+    def visit_continue_stmt(self, stmt):
+        self.__emit(OpCode.JUMP, self.__function.loops[-1][0])
+
+    def visit_expression_stmt(self, stmt):
+        self.__expr(stmt.expression)
+        self.__emit(OpCode.ECHO if self.__echo else OpCode.POP)
+
+    def visit_for_stmt(self, stmt):
+        if stmt.local_count != 0:
+            self.__begin_scope(stmt.local_count, stmt.captured)
+        if stmt.initializer is not None:
+            self.__statement(stmt.initializer)
+
+        # The increment sits before the condition, where continue and the end
+        # of the body jump back to, and the first iteration jumps over it.
+        code = self.__function.proto.code
+        start = len(code)
+        if stmt.increment is not None:
+            skip = self.__emit_jump(OpCode.JUMP)
+            start = len(code)
+            self.__expr(stmt.increment)
+            self.__emit(OpCode.POP)
+            self.__patch_jump(skip)
+        self.__expr(stmt.condition)
+        exit_jump = self.__emit_jump(OpCode.JUMP_IF_FALSE)
+
+        self.__function.loops.append((start, []))
+        self.__statement(stmt.body)
+        _, breaks = self.__function.loops.pop()
+
+        self.__emit(OpCode.JUMP, start)
+        self.__patch_jump(exit_jump)
+        for jump in breaks:
+            self.__patch_jump(jump)
+
+        if stmt.local_count != 0:
+            self.__end_scope()
+
+    def visit_function_stmt(self, stmt):
+        proto = FunctionProto(stmt.name.lexeme, len(stmt.params), stmt.memoized)
+        enclosing = self.__function
+        self.__function = self.FunctionState(proto, enclosing)
+
+        self.__begin_scope(stmt.local_count, stmt.captured)
+        for slot in range(len(stmt.params)):
+            if slot in stmt.captured:
+                self.__emit(OpCode.BOX, slot)
+        for statement in stmt.body:
+            self.__statement(statement)
+        self.__emit(OpCode.NIL)
+        self.__emit(OpCode.RETURN)
+
+        self.__function = enclosing
+        closure = self.__object_constant(proto)
+
+        # A function that can see its own name needs that cell before the
+        # closure is created.
+        base, captured = enclosing.scopes[-1] if enclosing.scopes else (0, ())
+        if stmt.slot is not None and stmt.slot in captured:
+            self.__emit(OpCode.NEW_CELL, base + stmt.slot)
+            self.__emit(OpCode.CLOSURE, closure)
+            self.__emit(OpCode.SET_CELL, base + stmt.slot)
+            self.__emit(OpCode.POP)
+            return
+
+        self.__emit(OpCode.CLOSURE, closure)
+        self.__define(stmt)
+
+    def visit_if_stmt(self, stmt):
+        self.__expr(stmt.condition)
+        else_jump = self.__emit_jump(OpCode.JUMP_IF_FALSE)
+        self.__statement(stmt.then_branch)
+
+        if stmt.else_branch is None:
+            self.__patch_jump(else_jump)
+            return
+
+        end_jump = self.__emit_jump(OpCode.JUMP)
+        self.__patch_jump(else_jump)
+        self.__statement(stmt.else_branch)
+        self.__patch_jump(end_jump)
+
+    def visit_print_stmt(self, stmt):
+        self.__expr(stmt.expression)
+        self.__emit(OpCode.PRINT)
+
+    def visit_return_stmt(self, stmt):
+        if stmt.value is None:
+            self.__emit(OpCode.NIL)
+        else:
+            self.__expr(stmt.value)
+        self.__emit(OpCode.RETURN)
+
+    def visit_var_stmt(self, stmt):
+        if stmt.initializer is None:
+            self.__emit(OpCode.NIL)
+        else:
+            self.__expr(stmt.initializer)
+        self.__define(stmt)
+
+    def visit_while_stmt(self, stmt):
+        start = len(self.__function.proto.code)
+        self.__expr(stmt.condition)
+        exit_jump = self.__emit_jump(OpCode.JUMP_IF_FALSE)
+
+        self.__function.loops.append((start, []))
+        self.__statement(stmt.body)
+        _, breaks = self.__function.loops.pop()
+
+        self.__emit(OpCode.JUMP, start)
+        self.__patch_jump(exit_jump)
+        for jump in breaks:
+            self.__patch_jump(jump)
+
+    # ------- Expressions ------- #
+
+    def visit_assign_expr(self, expr):
+        self.__expr(expr.value)
+        self.__variable(expr, False)
+
+    def visit_variable_expr(self, expr):
+        self.__variable(expr, True)
+
+    def visit_literal_expr(self, expr):
+        if expr.value is None:
+            self.__emit(OpCode.NIL)
+        elif expr.value is True:
+            self.__emit(OpCode.TRUE)
+        elif expr.value is False:
+            self.__emit(OpCode.FALSE)
+        else:
+            self.__emit(OpCode.CONSTANT, self.__constant(expr.value))
+
+    def visit_grouping_expr(self, expr):
+        self.__expr(expr.expression)
+
+    def visit_logical_expr(self, expr):
+        self.__expr(expr.left)
+        if expr.operator.token_type == TokenType.OR:
+            jump = self.__emit_jump(OpCode.JUMP_IF_TRUE_OR_POP)
+        else:
+            jump = self.__emit_jump(OpCode.JUMP_IF_FALSE_OR_POP)
+        self.__expr(expr.right)
+        self.__patch_jump(jump)
+
+    def visit_ternary_expr(self, expr):
+        self.__expr(expr.condition)
+        else_jump = self.__emit_jump(OpCode.JUMP_IF_FALSE)
+        self.__expr(expr.true_expr)
+        end_jump = self.__emit_jump(OpCode.JUMP)
+        self.__patch_jump(else_jump)
+        self.__expr(expr.false_expr)
+        self.__patch_jump(end_jump)
+
+    def visit_unary_expr(self, expr):
+        self.__expr(expr.right)
+        if expr.operator.token_type == TokenType.MINUS:
+            self.__emit(OpCode.NEGATE, token=expr.operator)
+        elif expr.operator.token_type == TokenType.BANG:
+            self.__emit(OpCode.NOT)
+        else:
+            self.__emit(OpCode.POP)
+            self.__emit(OpCode.NIL)
+
+    def visit_binary_expr(self, expr):
+        self.__expr(expr.left)
+        self.__expr(expr.right)
+        op = self.binary_opcodes.get(expr.operator.token_type)
+        if op is None:
+            self.__emit(OpCode.POP)
+            self.__emit(OpCode.POP)
+            self.__emit(OpCode.NIL)
+        else:
+            self.__emit(op, token=expr.operator)
+
+    # The VM's arithmetic opcodes already test operand types inline, so
+    # specialized nodes compile to the same ones.
+    visit_numeric_expr = visit_binary_expr
+    visit_concat_expr = visit_binary_expr
+
+    def visit_call_expr(self, expr):
+        self.__expr(expr.callee)
+        for argument in expr.arguments:
+            self.__expr(argument)
+        self.__emit(OpCode.CALL, len(expr.arguments), expr.paren)
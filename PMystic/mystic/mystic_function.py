@@ -1,26 +1,52 @@
 from mystic_callable import MysticCallable
-from environment import Environment
-from mystic_return import Return
+from environment import Cell, Frame
+from mystic_return import Return, TailCall
 
 
 class MysticFunction(MysticCallable):
-    def __init__(self, declaration, closure):
+    def __init__(self, declaration, cells):
         self.__declaration = declaration
-        self.__closure = closure
+        # Only the variables the body uses from outside, shared as Cells,
+        # rather than every scope the function was declared in.
+        self.__cells = cells
+        # Parameters that nested functions capture are boxed on entry.
+        arity = len(declaration.params)
+        self.__boxed = tuple(slot for slot in declaration.captured if slot < arity)
+        # Closures hold Cells rather than frames, so no frame outlives its call
+        # and finished ones are recycled here instead of being reallocated.
+        self.__frames = []
+        self.__blank = (None,) * declaration.local_count
 
     def arity(self):
         return len(self.__declaration.params)
 
     def call(self, interpreter, arguments):
-        env = Environment(self.__closure)
-        for i in range(self.arity()):
-            env.define(self.__declaration.params[i].lexeme, arguments[i])
+        function = self
+        # Tail calls come back as signals and run here, so a chain of them
+        # takes no extra Python stack.
+        while True:
+            declaration = function.__declaration
+            # Parameters take the first slots of a frame sized for every local.
+            frames = function.__frames
+            env = frames.pop() if frames else Frame(declaration.local_count)
+            values = env.values
+            values[: len(arguments)] = arguments
+            if function.__boxed:
+                for slot in function.__boxed:
+                    values[slot] = Cell(values[slot])
 
-        try:
-            interpreter._execute_block(self.__declaration.body, env)
-        except Return as return_value:
-            return return_value.value
-        return None
+            signal = interpreter._execute_function(
+                declaration.body, env, function.__cells
+            )
+            values[:] = function.__blank
+            frames.append(env)
+            if type(signal) is TailCall:
+                function = signal.function
+                arguments = signal.arguments
+                continue
+            if type(signal) is Return:
+                return signal.value
+            return None
 
     def __str__(self):
         return f"<fn {self.__declaration.name.lexeme}>"
@@ -1,25 +1,45 @@
+from functools import partial
+from operator import eq, ge, gt, le, lt, ne
 from expr import Expr
 from stmt import Stmt
 from token_type import TokenType
 from runtime_error import RTE
-from environment import Environment
+from environment import Cell, Environment, Frame
 from mystic_callable import MysticCallable
 from mystic_function import MysticFunction
-from mystic_return import Return
+from mystic_memo import MemoizedFunction
+from mystic_return import BREAK, CONTINUE, Return, TailCall
+from mystic_truth import is_truthy
+from loop_jit import DEOPT, LoopJit
+from counted_loop import CountedLoop
+from ast_cache import AstCache
+import mystic_number as number
+from mystic_number import MAX_EXACT, NUMBER_TYPES, is_number
 
 
 class Interpreter(Expr.Visitor, Stmt.Visitor):
-    class BreakException(RTE):
-        pass
-
-    class ContinueException(RTE):
-        pass
+    # Suffix of this engine's entries in the on-disk program cache.
+    cache_suffix = AstCache.SUFFIX
+    # Results each `memo fun` keeps before evicting the least recent.
+    memo_size = MemoizedFunction.DEFAULT_SIZE
+    # Iterations after which a while loop is compiled, or None to never
+    # compile loops.
+    jit_threshold = 1000
 
     def __init__(self, mystic):
         self.__mystic = mystic
         self.globals = Environment()
         self.__env = self.globals
-        self.__locals = {}
+        # Cells of the variables the running function captured.
+        self.__cells = ()
+        # Inline cache statistics for global reads and writes and call sites.
+        self.global_hits = 0
+        self.global_misses = 0
+        self.call_hits = 0
+        self.call_misses = 0
+        self.jit = None
+        if self.jit_threshold is not None:
+            self.jit = LoopJit(self, mystic, self.jit_threshold)
 
         class Clock(MysticCallable):
             def arity(self):
@@ -35,6 +55,10 @@ class Interpreter(Expr.Visitor, Stmt.Visitor):
 
         self.globals.define("clock", Clock())
 
+    def prepare(self, statements):
+        """Turn resolved statements into the program interpret() runs."""
+        return statements
+
     def interpret(self, statements):
         try:
             for statement in statements:
@@ -44,7 +68,7 @@ class Interpreter(Expr.Visitor, Stmt.Visitor):
 
     # ------- Helper Functions ------- #
 
-    def __stringify(self, obj):
+    def _stringify(self, obj):
         if obj is None:
             return "nil"
 
@@ -60,123 +84,281 @@ class Interpreter(Expr.Visitor, Stmt.Visitor):
         return expr.accept(self)
 
     def __execute(self, stmt):
-        stmt.accept(self)
-
-    def resolve(self, expr, depth):
-        self.__locals[expr] = depth
+        return stmt.accept(self)
 
     def _execute_block(self, statements, env):
+        """Run statements in env, returning the first completion signal."""
         previous = self.__env
         try:
             self.__env = env
             for statement in statements:
-                self.__execute(statement)
+                signal = statement.accept(self)
+                if signal is not None:
+                    return signal
+            return None
         finally:
             self.__env = previous
 
-    def __is_truthy(self, obj):
-        if obj is None:
-            return False
-        elif isinstance(obj, bool):
-            return obj
-        elif isinstance(obj, float):
-            return obj != 0
-        elif isinstance(obj, str):
-            return len(obj) > 0
-        elif isinstance(obj, char):
-            return obj != "\0"
-
-        return True
-
-    def __is_equal(self, left, right):
-        if left is None and right is None:
-            return True
-        if left is None:
-            return False
-
-        return left == right
-
-    def __check_number_operand(self, operator, operand):
-        if isinstance(operand, float):
-            return
-
-        raise RTE(expr.operator, "Operand must be a number.")
-
-    def __check_number_operands(self, operator, left, right):
-        if isinstance(left, float) and isinstance(right, float):
-            return
-
-        raise RTE(expr.operator, "Operands must be numbers.")
+    def _execute_function(self, statements, env, cells):
+        """Run a function body in env, reading its free variables from cells."""
+        previous = self.__env
+        previous_cells = self.__cells
+        try:
+            self.__env = env
+            self.__cells = cells
+            for statement in statements:
+                signal = statement.accept(self)
+                if signal is not None:
+                    return signal
+            return None
+        finally:
+            self.__env = previous
+            self.__cells = previous_cells
 
     # ------- Visitor Functions ------- #
+    def __define(self, stmt, value):
+        if stmt.slot is None:
+            self.globals.define(stmt.name.lexeme, value)
+        elif stmt.cell:
+            self.__env.values[stmt.slot] = Cell(value)
+        else:
+            self.__env.values[stmt.slot] = value
+
+    def __capture(self, free):
+        """The Cells a function declared here closes over, in resolver order."""
+        if not free:
+            return ()
+        env = self.__env
+        cells = self.__cells
+        return tuple(
+            [
+                cells[slot] if depth is None else env.get_at(depth, slot)
+                for depth, slot in free
+            ]
+        )
+
     def visit_function_stmt(self, stmt):
-        function = MysticFunction(stmt, self.__env)
-        self.__env.define(stmt.name.lexeme, function)
+        if stmt.cell:
+            # The Cell has to exist before the function so it can call itself.
+            cell = self.__env.values[stmt.slot] = Cell()
+        function = MysticFunction(stmt, self.__capture(stmt.free))
+        if stmt.memoized:
+            function = MemoizedFunction(function, self.memo_size)
+        if stmt.cell:
+            cell.value = function
+        else:
+            self.__define(stmt, function)
         return None
 
     def visit_block_stmt(self, stmt):
-        self._execute_block(stmt.statements, Environment(self.__env))
-        return None
+        if stmt.local_count == 0:
+            for statement in stmt.statements:
+                signal = statement.accept(self)
+                if signal is not None:
+                    return signal
+            return None
+
+        return self._execute_block(stmt.statements, Frame(stmt.local_count, self.__env))
 
     def visit_expression_stmt(self, stmt):
         value = self.__evaluate(stmt.expression)
         if self.__mystic.is_repl:
             # if value is not None:
-            print(self.__stringify(value))
+            print(self._stringify(value))
         return None
 
     def visit_if_stmt(self, stmt):
-        if self.__is_truthy(self.__evaluate(stmt.condition)):
-            self.__execute(stmt.then_branch)
+        if is_truthy(self.__evaluate(stmt.condition)):
+            return self.__execute(stmt.then_branch)
         elif stmt.else_branch is not None:
-            self.__execute(stmt.else_branch)
+            return self.__execute(stmt.else_branch)
         return None
 
     def visit_break_stmt(self, stmt):
-        raise self.BreakException("break", "Break statement.")
+        return BREAK
 
     def visit_continue_stmt(self, stmt):
-        raise self.ContinueException("continue", "Continue statement.")
+        return CONTINUE
 
     def visit_while_stmt(self, stmt):
+        jit = self.jit
+        if jit is not None:
+            signal = self.__run_compiled(stmt, jit)
+            if signal is not DEOPT:
+                return signal
+            return self.__tiered_loop(stmt, None, jit)
+
+        while is_truthy(self.__evaluate(stmt.condition)):
+            signal = self.__execute(stmt.body)
+            if signal is not None:
+                if signal is BREAK:
+                    break
+                if signal is not CONTINUE:
+                    return signal
+        return None
+
+    def visit_for_stmt(self, stmt):
+        if stmt.local_count == 0:
+            return self.__for(stmt)
+
+        previous = self.__env
         try:
-            while self.__is_truthy(self.__evaluate(stmt.condition)):
-                self.__execute(stmt.body)
-        except self.BreakException:
-            # Eat 5 star, do nothing
-            pass
-        except self.ContinueException:
-            self.visit_while_stmt(stmt)
+            self.__env = Frame(stmt.local_count, previous)
+            return self.__for(stmt)
+        finally:
+            self.__env = previous
+
+    def __for(self, stmt):
+        if stmt.initializer is not None:
+            self.__execute(stmt.initializer)
+
+        jit = self.jit
+        if jit is not None:
+            signal = self.__run_compiled(stmt, jit)
+            if signal is not DEOPT:
+                return signal
+
+        counted = stmt.counted
+        if counted is None:
+            counted = stmt.counted = CountedLoop.match(stmt) or False
+        if counted:
+            start = self.__env.values[counted.slot]
+            steps = counted.steps(start, self.__evaluate(counted.bound))
+            if steps is not None:
+                return self.__counted_for(stmt, counted, steps, jit)
+
+        if jit is not None:
+            return self.__tiered_loop(stmt, stmt.increment, jit)
+
+        increment = stmt.increment
+        while is_truthy(self.__evaluate(stmt.condition)):
+            signal = self.__execute(stmt.body)
+            if signal is not None:
+                if signal is BREAK:
+                    break
+                if signal is not CONTINUE:
+                    return signal
+            if increment is not None:
+                self.__evaluate(increment)
+        return None
+
+    def __counted_for(self, stmt, counted, steps, jit):
+        """Run the body of stmt once for each value of its counter in steps."""
+        values = self.__env.values
+        slot = counted.slot
+        body = stmt.body
+        if jit is None:
+            for value in steps:
+                values[slot] = value
+                signal = body.accept(self)
+                if signal is not None:
+                    if signal is BREAK:
+                        break
+                    if signal is not CONTINUE:
+                        return signal
+            return None
+
+        iterations = jit.iterations(stmt)
+        threshold = jit.threshold
+        for value in steps:
+            values[slot] = value
+            signal = body.accept(self)
+            if signal is not None:
+                if signal is BREAK:
+                    break
+                if signal is not CONTINUE:
+                    jit.count(stmt, iterations)
+                    return signal
+
+            iterations += 1
+            if iterations == threshold:
+                jit.count(stmt, iterations)
+                # Compiled code starts at the condition, after the increment.
+                values[slot] = value + counted.step
+                signal = self.__run_compiled(stmt, jit)
+                if signal is not DEOPT:
+                    return signal
+                iterations = 0
+        jit.count(stmt, iterations)
+        return None
+
+    def __tiered_loop(self, stmt, increment, jit):
+        """
+        Interpret stmt, a while or for loop, while counting iterations, and
+        switch to compiled code between two iterations once it gets hot.
+        """
+        iterations = jit.iterations(stmt)
+        threshold = jit.threshold
+        while is_truthy(self.__evaluate(stmt.condition)):
+            signal = self.__execute(stmt.body)
+            if signal is not None:
+                if signal is BREAK:
+                    break
+                if signal is not CONTINUE:
+                    jit.count(stmt, iterations)
+                    return signal
+            if increment is not None:
+                self.__evaluate(increment)
+
+            iterations += 1
+            if iterations == threshold:
+                jit.count(stmt, iterations)
+                signal = self.__run_compiled(stmt, jit)
+                if signal is not DEOPT:
+                    return signal
+                iterations = 0
+        jit.count(stmt, iterations)
         return None
 
+    def __run_compiled(self, stmt, jit):
+        """
+        Run the rest of stmt as compiled code, or return DEOPT if it has none
+        or its guards fail on entry.
+        """
+        loop = jit.loop(stmt, self.__env)
+        if loop is None:
+            return DEOPT
+        signal = loop(self.__env, self.__cells)
+        if signal is DEOPT:
+            jit.deoptimize(stmt)
+        return signal
+
     def visit_print_stmt(self, stmt):
         value = self.__evaluate(stmt.expression)
-        print(self.__stringify(value))
+        print(self._stringify(value))
         return None
 
     def visit_return_stmt(self, stmt):
+        if stmt.tail_call:
+            call = stmt.value
+            callee = self.__evaluate(call.callee)
+            arguments = [self.__evaluate(argument) for argument in call.arguments]
+            return self._tail_call(call, callee, arguments)
+
         value = None
         if stmt.value:
             value = self.__evaluate(stmt.value)
-        raise Return(value)
+        return Return(value)
 
     def visit_var_stmt(self, stmt):
         value = None
         if stmt.initializer != None:
             value = self.__evaluate(stmt.initializer)
-        self.__env.define(stmt.name.lexeme, value)
+        self.__define(stmt, value)
         return None
 
     def visit_assign_expr(self, expr):
         value = self.__evaluate(expr.value)
 
-        dist = self.__locals.get(expr)
-        if dist is not None:
-            self.__env.assign_at(dist, expr.name, value)
+        if expr.upvalue is not None:
+            self.__cells[expr.upvalue].value = value
+        elif expr.cell:
+            self.__env.get_at(expr.depth, expr.slot).value = value
+        elif expr.depth is not None:
+            self.__env.assign_at(expr.depth, expr.slot, value)
         else:
-            self.globals.assign(expr.name, value)
+            self.__global(expr).value = value
 
-        self.__env.assign(expr.name, value)
         return value
 
     def visit_variable_expr(self, expr):
@@ -194,35 +376,63 @@ class Interpreter(Expr.Visitor, Stmt.Visitor):
         return self.__look_up_variable(expr.name, expr)
 
     def __look_up_variable(self, name, expr):
-        dist = self.__locals.get(expr)
-
-        if dist is not None:
-            return self.__env.get_at(dist, name.lexeme)
+        depth = expr.depth
+        if depth is None:
+            if expr.version == self.globals.version:
+                self.global_hits += 1
+                return expr.binding.value
+            return self.__global(expr).value
+        if expr.upvalue is not None:
+            return self.__cells[expr.upvalue].value
+        if depth == 0:
+            value = self.__env.values[expr.slot]
         else:
-            return self.globals.get(name)
+            value = self.__env.get_at(depth, expr.slot)
+        return value.value if expr.cell else value
+
+    def __global(self, expr):
+        """
+        The Cell of expr's global. Sites keep it with the version of globals
+        it was found in and reuse it until a new global is defined.
+        """
+        if expr.version == self.globals.version:
+            self.global_hits += 1
+            return expr.binding
+        self.global_misses += 1
+        binding = expr.binding = self.globals.cell(expr.name)
+        expr.version = self.globals.version
+        return binding
 
     def visit_literal_expr(self, expr):
         return expr.value
 
     def visit_logical_expr(self, expr):
-        left = self.__evaluate(expr.left)
+        handler = expr.handler
+        if handler is None:
+            handler = expr.handler = self.logical_handlers[expr.operator.token_type]
+        return handler(self, expr)
 
-        if expr.operator.token_type == TokenType.OR:
-            if self.__is_truthy(left):
-                return left
-        else:
-            if not self.__is_truthy(left):
-                return left
+    def __or(self, expr):
+        left = self.__evaluate(expr.left)
+        if is_truthy(left):
+            return left
+        return self.__evaluate(expr.right)
 
+    def __and(self, expr):
+        left = self.__evaluate(expr.left)
+        if not is_truthy(left):
+            return left
         return self.__evaluate(expr.right)
 
+    logical_handlers = {TokenType.OR: __or, TokenType.AND: __and}
+
     def visit_grouping_expr(self, expr):
         return self.__evaluate(expr.expression)
 
     def visit_ternary_expr(self, expr):
         condition = self.__evaluate(expr.condition)
 
-        if self.__is_truthy(condition):
+        if is_truthy(condition):
             return self.__evaluate(expr.true_expr)
         return self.__evaluate(expr.false_expr)
 
@@ -230,47 +440,128 @@ class Interpreter(Expr.Visitor, Stmt.Visitor):
         left = self.__evaluate(expr.left)
         right = self.__evaluate(expr.right)
 
-        if expr.operator.token_type == TokenType.MINUS:
-            self.__check_number_operands(expr.operator, left, right)
-            return float(left) - float(right)
-        elif expr.operator.token_type == TokenType.SLASH:
-            self.__check_number_operands(expr.operator, left, right)
-            if float(right) == 0:
-                raise RTE(expr.operator, "Cannot divide by zero.")
-            return float(left) / float(right)
-        elif expr.operator.token_type == TokenType.STAR:
-            self.__check_number_operands(expr.operator, left, right)
-            return float(left) * float(right)
-        elif expr.operator.token_type == TokenType.PLUS:
-            if isinstance(left, float) and isinstance(right, float):
-                return float(left) + float(right)
-            elif isinstance(left, str) and isinstance(right, str):
-                return str(left) + str(right)
-            elif isinstance(left, float) and isinstance(right, str):
-                return self.__stringify(left) + str(right)
-            elif isinstance(left, str) and isinstance(right, float):
-                return str(left) + self.__stringify(right)
-        elif expr.operator.token_type == TokenType.GREATER:
-            self.__check_number_operands(expr.operator, left, right)
-            return float(left) > float(right)
-        elif expr.operator.token_type == TokenType.GREATER_EQUAL:
-            self.__check_number_operands(expr.operator, left, right)
-            return float(left) >= float(right)
-        elif expr.operator.token_type == TokenType.LESS:
-            self.__check_number_operands(expr.operator, left, right)
-            return float(left) < float(right)
-        elif expr.operator.token_type == TokenType.LESS_EQUAL:
-            self.__check_number_operands(expr.operator, left, right)
-            return float(left) <= float(right)
-        elif expr.operator.token_type == TokenType.EQUAL_EQUAL:
-            self.__check_number_operands(expr.operator, left, right)
-            return self.__is_equal(left, right)
-        elif expr.operator.token_type == TokenType.BANG_EQUAL:
-            self.__check_number_operands(expr.operator, left, right)
-            return not self.__is_equal(left, right)
+        handler = expr.handler
+        if handler is None:
+            handler = expr.handler = self.binary_handlers.get(
+                expr.operator.token_type, Interpreter.__no_operator
+            )
+        return handler(self, expr.operator, left, right)
+
+    # Binary handlers take (operator, left, right). Numbers are floats or
+    # exact ints, so same-type operands take the fast path and the rest go
+    # through the checked operations in mystic_number.
 
+    def __no_operator(self, operator, left, right):
         return None
 
+    def __add(self, operator, left, right):
+        if type(left) is type(right):
+            if type(left) is float or type(left) is str:
+                return left + right
+            if type(left) is int:
+                value = left + right
+                return value if -MAX_EXACT <= value <= MAX_EXACT else float(value)
+        elif type(left) is str:
+            if is_number(right):
+                return left + self._stringify(right)
+            return None
+        elif type(right) is str:
+            if is_number(left):
+                return self._stringify(left) + right
+            return None
+        return number.add(left, right)
+
+    def __subtract(self, operator, left, right):
+        if type(left) is type(right):
+            if type(left) is float:
+                return left - right
+            if type(left) is int:
+                value = left - right
+                return value if -MAX_EXACT <= value <= MAX_EXACT else float(value)
+        return number.subtract(operator, left, right)
+
+    def __multiply(self, operator, left, right):
+        if type(left) is float and type(right) is float:
+            return left * right
+        return number.multiply(operator, left, right)
+
+    def __divide(self, operator, left, right):
+        return number.divide(operator, left, right)
+
+    def __greater(self, operator, left, right):
+        if type(left) in NUMBER_TYPES and type(right) in NUMBER_TYPES:
+            return left > right
+        raise RTE(operator, "Operands must be numbers.")
+
+    def __greater_equal(self, operator, left, right):
+        if type(left) in NUMBER_TYPES and type(right) in NUMBER_TYPES:
+            return left >= right
+        raise RTE(operator, "Operands must be numbers.")
+
+    def __less(self, operator, left, right):
+        if type(left) in NUMBER_TYPES and type(right) in NUMBER_TYPES:
+            return left < right
+        raise RTE(operator, "Operands must be numbers.")
+
+    def __less_equal(self, operator, left, right):
+        if type(left) in NUMBER_TYPES and type(right) in NUMBER_TYPES:
+            return left <= right
+        raise RTE(operator, "Operands must be numbers.")
+
+    def __equal(self, operator, left, right):
+        if type(left) in NUMBER_TYPES and type(right) in NUMBER_TYPES:
+            return left == right
+        raise RTE(operator, "Operands must be numbers.")
+
+    def __not_equal(self, operator, left, right):
+        if type(left) in NUMBER_TYPES and type(right) in NUMBER_TYPES:
+            return left != right
+        raise RTE(operator, "Operands must be numbers.")
+
+    binary_handlers = {
+        TokenType.PLUS: __add,
+        TokenType.MINUS: __subtract,
+        TokenType.STAR: __multiply,
+        TokenType.SLASH: __divide,
+        TokenType.GREATER: __greater,
+        TokenType.GREATER_EQUAL: __greater_equal,
+        TokenType.LESS: __less,
+        TokenType.LESS_EQUAL: __less_equal,
+        TokenType.EQUAL_EQUAL: __equal,
+        TokenType.BANG_EQUAL: __not_equal,
+    }
+
+    def visit_numeric_expr(self, expr):
+        left = self.__evaluate(expr.left)
+        right = self.__evaluate(expr.right)
+
+        handler = expr.handler
+        if handler is None:
+            token_type = expr.operator.token_type
+            if token_type == TokenType.SLASH:
+                handler = partial(number.divide_numbers, expr.operator)
+            else:
+                handler = self.numeric_handlers[token_type]
+            expr.handler = handler
+        return handler(left, right)
+
+    # Numeric handlers take (left, right), which type inference proved are
+    # numbers; division also needs its operator for the error it can raise.
+    numeric_handlers = {
+        TokenType.PLUS: number.add_numbers,
+        TokenType.MINUS: number.subtract_numbers,
+        TokenType.STAR: number.multiply_numbers,
+        TokenType.GREATER: gt,
+        TokenType.GREATER_EQUAL: ge,
+        TokenType.LESS: lt,
+        TokenType.LESS_EQUAL: le,
+        TokenType.EQUAL_EQUAL: eq,
+        TokenType.BANG_EQUAL: ne,
+    }
+
+    def visit_concat_expr(self, expr):
+        return self.__evaluate(expr.left) + self.__evaluate(expr.right)
+
     def visit_call_expr(self, expr):
         callee = self.__evaluate(expr.callee)
 
@@ -278,28 +569,72 @@ class Interpreter(Expr.Visitor, Stmt.Visitor):
         for argument in expr.arguments:
             arguments.append(self.__evaluate(argument))
 
+        # A site calls the same function with the same number of arguments
+        # each time, so a callee that passed here once needs no checks. The
+        # cache starts out as None, which is never a valid callee.
+        if callee is expr.target and callee is not None:
+            self.call_hits += 1
+        else:
+            self.__check_call(callee, arguments, expr)
+        return callee.call(self, arguments)
+
+    def _call(self, expr, callee, arguments):
+        """Call callee as the call site expr does."""
+        if callee is expr.target and callee is not None:
+            self.call_hits += 1
+        else:
+            self.__check_call(callee, arguments, expr)
+        return callee.call(self, arguments)
+
+    def _tail_call(self, expr, callee, arguments):
+        """The signal that returns the call expr of callee from a function."""
+        if callee is expr.target and callee is not None:
+            self.call_hits += 1
+        else:
+            self.__check_call(callee, arguments, expr)
+        if type(callee) is MysticFunction:
+            return TailCall(callee, arguments)
+        return Return(callee.call(self, arguments))
+
+    def __check_call(self, callee, arguments, expr):
+        """Check a callee the site has not cached, then cache it."""
+        self.call_misses += 1
+
+        paren = expr.paren
         if not isinstance(callee, MysticCallable):
-            raise RTE(expr.paren, "Can only call functions and classes.")
+            raise RTE(paren, "Can only call functions and classes.")
 
         if len(arguments) != callee.arity():
             raise RTE(
-                expr.paren,
+                paren,
                 "Expected "
                 + str(callee.arity())
                 + " arguments but got "
                 + str(len(arguments))
                 + ".",
             )
-
-        return callee.call(self, arguments)
+        expr.target = callee
 
     def visit_unary_expr(self, expr):
         right = self.__evaluate(expr.right)
 
-        if expr.operator.token_type == TokenType.MINUS:
-            self.__check_number_operand(expr.operator, right)
-            return -right
-        elif expr.operator.token_type == TokenType.BANG:
-            return not self.__is_truthy(right)
+        handler = expr.handler
+        if handler is None:
+            handler = expr.handler = self.unary_handlers.get(
+                expr.operator.token_type, Interpreter.__no_unary_operator
+            )
+        return handler(self, expr.operator, right)
 
+    def __no_unary_operator(self, operator, right):
         return None
+
+    def __negate(self, operator, right):
+        if type(right) is float:
+            return -right
+        number.check_operand(operator, right)
+        return number.negate(right)
+
+    def __not(self, operator, right):
+        return not is_truthy(right)
+
+    unary_handlers = {TokenType.MINUS: __negate, TokenType.BANG: __not}
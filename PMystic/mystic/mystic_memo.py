@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from mystic_callable import MysticCallable
+
+
+class LruCache:
+    """Bounded mapping that drops its least recently used entry when full."""
+
+    __slots__ = ("size", "hits", "misses", "__entries")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key, default=None):
+        entries = self.__entries
+        if key in entries:
+            self.hits += 1
+            entries.move_to_end(key)
+            return entries[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        entries = self.__entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.size:
+            entries.popitem(last=False)
+
+    def clear(self):
+        self.__entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class MemoizedFunction(MysticCallable):
+    """
+    Wraps a function declared with `memo fun`, caching its results by
+    argument tuple. Argument types are part of the key so that `true` and
+    `1` are not confused, but an exact int and the equal float are the same
+    Mystic number and share an entry.
+    """
+
+    __slots__ = ("function", "cache")
+
+    # Entries each memoized function keeps unless an interpreter says otherwise.
+    DEFAULT_SIZE = 1024
+    __missing = object()
+    # Type each argument type stands for in keys.
+    __kinds = {int: float}
+
+    def __init__(self, function, size: int = DEFAULT_SIZE):
+        self.function = function
+        self.cache = LruCache(size)
+
+    def arity(self):
+        return self.function.arity()
+
+    def call(self, interpreter, arguments):
+        kinds = self.__kinds
+        key = (*[kinds.get(type(a), type(a)) for a in arguments], *arguments)
+        value = self.cache.get(key, self.__missing)
+        if value is self.__missing:
+            value = self.function.call(interpreter, arguments)
+            self.cache.put(key, value)
+        return value
+
+    def __str__(self):
+        return str(self.function)
@@ -0,0 +1,113 @@
+from runtime_error import RTE
+
+# Mystic has one number type with the semantics of a double. Internally a
+# number is a float, or an int while it is provably integral and within the
+# range a double holds exactly, which keeps counters and indexes on Python's
+# int arithmetic. Every result an int produces is the one the double would
+# have given, so the two are indistinguishable from Mystic code.
+
+# Largest magnitude below which every integer is exactly a double.
+MAX_EXACT = 2**53
+
+NUMBER_TYPES = (float, int)
+
+
+def is_number(value) -> bool:
+    return type(value) is float or type(value) is int
+
+
+def exact(value: int):
+    """Keep an int result only while a double would hold it exactly."""
+    if -MAX_EXACT <= value <= MAX_EXACT:
+        return value
+    return float(value)
+
+
+def parse_integer(lexeme: str):
+    return exact(int(lexeme))
+
+
+def negate(value):
+    # An int is never -0, so negating zero has to produce the float.
+    if type(value) is int and value == 0:
+        return -0.0
+    return -value
+
+
+# Checked operations for any pair of operands. Engines try their own fast
+# paths first and fall back to these for mixed, out of range or bad operands.
+
+
+def add(left, right):
+    """Numeric addition, or None when either operand is not a number."""
+    if not is_number(left) or not is_number(right):
+        return None
+    value = left + right
+    return exact(value) if type(value) is int else value
+
+
+def subtract(operator, left, right):
+    check_operands(operator, left, right)
+    value = left - right
+    return exact(value) if type(value) is int else value
+
+
+def multiply(operator, left, right):
+    check_operands(operator, left, right)
+    value = left * right
+    if type(value) is int:
+        # A zero product with a negative factor is -0 for doubles.
+        if value == 0 and (left < 0 or right < 0):
+            return -0.0
+        return exact(value)
+    return value
+
+
+def divide(operator, left, right):
+    check_operands(operator, left, right)
+    if right == 0:
+        raise RTE(operator, "Cannot divide by zero.")
+    return left / right
+
+
+def check_operand(operator, operand):
+    if not is_number(operand):
+        raise RTE(operator, "Operand must be a number.")
+
+
+def check_operands(operator, left, right):
+    if not is_number(left) or not is_number(right):
+        raise RTE(operator, "Operands must be numbers.")
+
+
+# Operations on operands already known to be numbers, for nodes that type
+# inference specialized. They keep the int rules but skip the checks.
+
+
+def add_numbers(left, right):
+    value = left + right
+    if type(value) is int and not -MAX_EXACT <= value <= MAX_EXACT:
+        return float(value)
+    return value
+
+
+def subtract_numbers(left, right):
+    value = left - right
+    if type(value) is int and not -MAX_EXACT <= value <= MAX_EXACT:
+        return float(value)
+    return value
+
+
+def multiply_numbers(left, right):
+    value = left * right
+    if type(value) is int:
+        if value == 0 and (left < 0 or right < 0):
+            return -0.0
+        return exact(value)
+    return value
+
+
+def divide_numbers(operator, left, right):
+    if right == 0:
+        raise RTE(operator, "Cannot divide by zero.")
+    return left / right
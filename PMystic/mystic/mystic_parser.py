@@ -8,25 +8,60 @@ class MysticParser:
     class ParseError(Exception):
         pass
 
+    # Binding powers for the precedence-climbing expression parser, lowest
+    # first. They mirror the levels of the recursive-descent grammar below.
+    ASSIGNMENT = 1
+    OR = 2
+    AND = 3
+    TERNARY = 4
+    EQUALITY = 5
+    COMPARISON = 6
+    TERM = 7
+    FACTOR = 8
+    UNARY = 9
+    CALL = 10
+
+    infix_precedence = {
+        TokenType.EQUAL: ASSIGNMENT,
+        TokenType.OR: OR,
+        TokenType.AND: AND,
+        TokenType.QUESTION: TERNARY,
+        TokenType.BANG_EQUAL: EQUALITY,
+        TokenType.EQUAL_EQUAL: EQUALITY,
+        TokenType.LESS: COMPARISON,
+        TokenType.LESS_EQUAL: COMPARISON,
+        TokenType.GREATER: COMPARISON,
+        TokenType.GREATER_EQUAL: COMPARISON,
+        TokenType.MINUS: TERM,
+        TokenType.PLUS: TERM,
+        TokenType.SLASH: FACTOR,
+        TokenType.STAR: FACTOR,
+        TokenType.LEFT_PAREN: CALL,
+    }
+
     def parse(self):
         statements = []
         while not self.__is_at_end():
             statements.append(self.__declaration())
         return statements
 
-    def __init__(self, tokens: list, mystic):
+    def __init__(self, tokens, mystic, precedence_climbing: bool = True):
+        # Tokens may be a list or a lazy stream; only the current token and
+        # the one before it are kept, in a two-slot ring buffer.
         self.__current = 0
         self.__loop_depth = 0
-        self.__tokens = tokens
+        self.__tokens = iter(tokens)
+        self.__window = [next(self.__tokens), None]
         self.__mystic = mystic
+        self.__precedence_climbing = precedence_climbing
 
     # ------- Helper Functions ------- #
 
     def __peek(self) -> Token:
-        return self.__tokens[self.__current]
+        return self.__window[self.__current & 1]
 
     def __previous(self) -> Token:
-        return self.__tokens[self.__current - 1]
+        return self.__window[(self.__current - 1) & 1]
 
     def __is_at_end(self) -> bool:
         return self.__peek().token_type == TokenType.EOF
@@ -40,6 +75,7 @@ class MysticParser:
     def __advance(self) -> Token:
         if not self.__is_at_end():
             self.__current += 1
+            self.__window[self.__current & 1] = next(self.__tokens)
 
         return self.__previous()
 
@@ -65,6 +101,7 @@ class MysticParser:
             if self.__peek().token_type in (
                 TokenType.CLASS,
                 TokenType.FUN,
+                TokenType.MEMO,
                 TokenType.STORE,
                 TokenType.FOR,
                 TokenType.IF,
@@ -87,7 +124,7 @@ class MysticParser:
     """
     program         → declaration* EOF
     declaration     → funDecl | varDecl | statement
-    funDecl         → "fun" function
+    funDecl         → "memo"? "fun" function
     function        → IDENTIFIER "(" parameters? ")" block
     parameters      → IDENTIFIER ( "," IDENTIFIER )*
     varDecl         → "store" IDENTIFIER ( "=" expression )?
@@ -116,6 +153,9 @@ class MysticParser:
         try:
             if self.__match(TokenType.FUN):
                 return self.__fun_declaration("function")
+            if self.__match(TokenType.MEMO):
+                self.__consume(TokenType.FUN, "Expect 'fun' after 'memo'.")
+                return self.__fun_declaration("function", memoized=True)
             if self.__match(TokenType.STORE):
                 return self.__var_declaration()
             return self.__statement()
@@ -123,7 +163,7 @@ class MysticParser:
             self.__synchronize()
             return None
 
-    def __fun_declaration(self, kind: str):
+    def __fun_declaration(self, kind: str, memoized: bool = False):
         name = self.__consume(TokenType.IDENTIFIER, f"Expect {kind} name.")
 
         self.__consume(TokenType.LEFT_PAREN, f"Expect '(' after {kind} name.")
@@ -142,7 +182,7 @@ class MysticParser:
 
         self.__consume(TokenType.LEFT_BRACE, f"Expect '{{' before {kind} body.")
         body = self.__block()
-        return Stmt.Function(name, parameters, body)
+        return Stmt.Function(name, parameters, body, memoized)
 
     def __var_declaration(self):
         name = self.__consume(TokenType.IDENTIFIER, "Expect variable name.")
@@ -251,17 +291,9 @@ class MysticParser:
             self.__loop_depth += 1
             body = self.__statement()
 
-            if increment is not None:
-                body = Stmt.Block([body, Stmt.Expression(increment)])
-
             if condition is None:
                 condition = Expr.Literal(True)
-            body = Stmt.While(condition, body)
-
-            if initializer is not None:
-                body = Stmt.Block([initializer, body])
-
-            return body
+            return Stmt.For(initializer, condition, increment, body)
         finally:
             self.__loop_depth -= 1
 
@@ -290,8 +322,73 @@ class MysticParser:
         return statements
 
     def __expression(self):
+        if self.__precedence_climbing:
+            return self.__parse_precedence(self.ASSIGNMENT)
         return self.__assignment()
 
+    # ------- Precedence Climbing ------- #
+
+    def __parse_precedence(self, min_precedence: int):
+        """
+        Parse an expression whose infix operators all bind at least as tightly
+        as min_precedence. Builds the same trees as the assignment → primary
+        ladder: logical operators, the ternary and assignment combine at most
+        once per level, so only looser operators may follow them.
+        """
+        expr = self.__prefix()
+        ceiling = self.CALL + 1
+
+        while True:
+            operator = self.__peek()
+            precedence = self.infix_precedence.get(operator.token_type)
+            if (
+                precedence is None
+                or precedence < min_precedence
+                or precedence >= ceiling
+            ):
+                return expr
+            self.__advance()
+
+            if precedence == self.CALL:
+                expr = self.__finish_call(expr)
+            elif precedence >= self.EQUALITY:
+                right = self.__parse_precedence(precedence + 1)
+                expr = Expr.Binary(expr, operator, right)
+            elif precedence == self.TERNARY:
+                true_expr = self.__parse_precedence(self.EQUALITY)
+                self.__consume(TokenType.COLON, "Expect ':' after expression.")
+                false_expr = self.__parse_precedence(self.EQUALITY)
+                expr = Expr.Ternary(expr, true_expr, false_expr)
+                ceiling = precedence
+            elif precedence != self.ASSIGNMENT:
+                right = self.__parse_precedence(precedence + 1)
+                expr = Expr.Logical(expr, operator, right)
+                ceiling = precedence
+            else:
+                value = self.__parse_precedence(self.ASSIGNMENT)
+                if isinstance(expr, Expr.Variable):
+                    return Expr.Assign(expr.name, value)
+                self.__error(operator, "Invalid assignment target.")
+                return expr
+
+    def __prefix(self):
+        token = self.__peek()
+        token_type = token.token_type
+
+        if token_type == TokenType.NUMBER or token_type == TokenType.STRING:
+            self.__advance()
+            return Expr.Literal(token.literal)
+        if token_type == TokenType.IDENTIFIER:
+            self.__advance()
+            return Expr.Variable(token)
+        if token_type == TokenType.BANG or token_type == TokenType.MINUS:
+            self.__advance()
+            return Expr.Unary(token, self.__parse_precedence(self.UNARY))
+
+        return self.__primary()
+
+    # ------- Recursive Descent ------- #
+
     def __assignment(self):
         expr = self.__or()
 
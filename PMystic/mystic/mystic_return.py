@@ -1,4 +1,20 @@
-class Return(Exception):
+# Completion signals returned by statements. None means "carry on".
+BREAK = object()
+CONTINUE = object()
+
+
+class Return:
+    __slots__ = ("value",)
+
     def __init__(self, value):
-        super().__init__()
         self.value = value
+
+
+class TailCall:
+    """Returned by `return f(...)` so the caller runs f in place of itself."""
+
+    __slots__ = ("function", "arguments")
+
+    def __init__(self, function, arguments):
+        self.function = function
+        self.arguments = arguments
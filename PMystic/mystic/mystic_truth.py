@@ -0,0 +1,21 @@
+# Truthiness of Mystic values, keyed by Python type so a test is one dict
+# lookup. nil and false are falsey, as are the number zero and the empty
+# string; every other value, functions included, is truthy. Python's own
+# bool() gives exactly that answer for each primitive type listed here.
+TRUTHINESS = {
+    type(None): bool,
+    bool: bool,
+    float: bool,
+    int: bool,
+    str: bool,
+}
+
+
+def always_true(value) -> bool:
+    return True
+
+
+def is_truthy(value) -> bool:
+    if value is True:
+        return True
+    return TRUTHINESS.get(type(value), always_true)(value)
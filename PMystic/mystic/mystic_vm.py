@@ -0,0 +1,338 @@
+from runtime_error import RTE
+from environment import Cell
+from mystic_callable import MysticCallable
+from mystic_interpreter import Interpreter
+from mystic_memo import MemoizedFunction
+import mystic_number as number
+from mystic_number import MAX_EXACT, NUMBER_TYPES, is_number
+from mystic_compiler import BytecodeCompiler, OpCode
+
+
+class VMClosure(MysticCallable):
+    __slots__ = ("proto", "upvalues", "vm")
+
+    def __init__(self, proto, upvalues, vm):
+        self.proto = proto
+        self.upvalues = upvalues
+        self.vm = vm
+
+    def arity(self):
+        return self.proto.arity
+
+    def call(self, interpreter, arguments):
+        return self.vm.run(self, list(arguments))
+
+    def __str__(self):
+        return f"<fn {self.proto.name}>"
+
+
+class VM:
+    """
+    Stack machine for FunctionProto bytecode. Operands live on one value
+    stack; each call frame has its own slot list, and suspended frames are
+    kept on an explicit frame stack rather than the Python stack.
+    """
+
+    def __init__(self, interpreter):
+        self.__interpreter = interpreter
+        self.__globals = interpreter.globals
+        self.__stringify = interpreter._stringify
+
+    def run(self, closure, arguments):
+        proto = closure.proto
+        slots = arguments + [None] * (proto.local_count - len(arguments))
+        code = proto.code
+        constants = proto.constants
+        upvalues = closure.upvalues
+        ip = 0
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        frames = []
+
+        globals = self.__globals
+        stringify = self.__stringify
+        interpreter = self.__interpreter
+
+        CONSTANT = OpCode.CONSTANT
+        NIL = OpCode.NIL
+        TRUE = OpCode.TRUE
+        FALSE = OpCode.FALSE
+        POP = OpCode.POP
+        GET_LOCAL = OpCode.GET_LOCAL
+        SET_LOCAL = OpCode.SET_LOCAL
+        STORE_LOCAL = OpCode.STORE_LOCAL
+        GET_CELL = OpCode.GET_CELL
+        SET_CELL = OpCode.SET_CELL
+        DEFINE_CELL = OpCode.DEFINE_CELL
+        NEW_CELL = OpCode.NEW_CELL
+        BOX = OpCode.BOX
+        GET_UPVALUE = OpCode.GET_UPVALUE
+        SET_UPVALUE = OpCode.SET_UPVALUE
+        GET_GLOBAL = OpCode.GET_GLOBAL
+        SET_GLOBAL = OpCode.SET_GLOBAL
+        DEFINE_GLOBAL = OpCode.DEFINE_GLOBAL
+        ADD = OpCode.ADD
+        SUBTRACT = OpCode.SUBTRACT
+        MULTIPLY = OpCode.MULTIPLY
+        DIVIDE = OpCode.DIVIDE
+        GREATER = OpCode.GREATER
+        GREATER_EQUAL = OpCode.GREATER_EQUAL
+        LESS = OpCode.LESS
+        LESS_EQUAL = OpCode.LESS_EQUAL
+        EQUAL = OpCode.EQUAL
+        NOT_EQUAL = OpCode.NOT_EQUAL
+        NEGATE = OpCode.NEGATE
+        NOT = OpCode.NOT
+        PRINT = OpCode.PRINT
+        ECHO = OpCode.ECHO
+        JUMP = OpCode.JUMP
+        JUMP_IF_FALSE = OpCode.JUMP_IF_FALSE
+        JUMP_IF_FALSE_OR_POP = OpCode.JUMP_IF_FALSE_OR_POP
+        JUMP_IF_TRUE_OR_POP = OpCode.JUMP_IF_TRUE_OR_POP
+        CALL = OpCode.CALL
+        CLOSURE = OpCode.CLOSURE
+        RETURN = OpCode.RETURN
+
+        while True:
+            op = code[ip]
+            ip += 1
+
+            if op == GET_LOCAL:
+                push(slots[code[ip]])
+                ip += 1
+            elif op == CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif op == JUMP_IF_FALSE:
+                value = pop()
+                if value is True:
+                    ip += 1
+                elif value is None or value is False or value == 0 or value == "":
+                    ip = code[ip]
+                else:
+                    ip += 1
+            elif op == STORE_LOCAL:
+                slots[code[ip]] = pop()
+                ip += 1
+            elif op == POP:
+                pop()
+            elif op == GET_GLOBAL:
+                push(globals.get(constants[code[ip]]))
+                ip += 1
+            elif op == ADD:
+                b = pop()
+                a = stack[-1]
+                if type(a) is type(b) and (type(a) is float or type(a) is str):
+                    stack[-1] = a + b
+                elif type(a) is int and type(b) is int:
+                    value = a + b
+                    if -MAX_EXACT <= value <= MAX_EXACT:
+                        stack[-1] = value
+                    else:
+                        stack[-1] = float(value)
+                elif type(a) is str:
+                    stack[-1] = a + stringify(b) if is_number(b) else None
+                elif type(b) is str:
+                    stack[-1] = stringify(a) + b if is_number(a) else None
+                else:
+                    stack[-1] = number.add(a, b)
+            elif op == SUBTRACT:
+                b = pop()
+                a = stack[-1]
+                if type(a) is float and type(b) is float:
+                    stack[-1] = a - b
+                elif type(a) is int and type(b) is int:
+                    value = a - b
+                    if -MAX_EXACT <= value <= MAX_EXACT:
+                        stack[-1] = value
+                    else:
+                        stack[-1] = float(value)
+                else:
+                    stack[-1] = number.subtract(proto.tokens[ip - 1], a, b)
+            elif op == LESS:
+                b = pop()
+                a = stack[-1]
+                if type(a) not in NUMBER_TYPES or type(b) not in NUMBER_TYPES:
+                    raise RTE(proto.tokens[ip - 1], "Operands must be numbers.")
+                stack[-1] = a < b
+            elif op == LESS_EQUAL:
+                b = pop()
+                a = stack[-1]
+                if type(a) not in NUMBER_TYPES or type(b) not in NUMBER_TYPES:
+                    raise RTE(proto.tokens[ip - 1], "Operands must be numbers.")
+                stack[-1] = a <= b
+            elif op == SET_LOCAL:
+                slots[code[ip]] = stack[-1]
+                ip += 1
+            elif op == JUMP:
+                ip = code[ip]
+            elif op == CALL:
+                count = code[ip]
+                ip += 1
+                callee = stack[-1 - count]
+
+                if type(callee) is VMClosure and callee.proto.arity == count:
+                    frames.append((closure, code, constants, upvalues, slots, ip))
+                    closure = callee
+                    proto = callee.proto
+                    code = proto.code
+                    constants = proto.constants
+                    upvalues = callee.upvalues
+                    slots = stack[len(stack) - count :]
+                    if proto.local_count > count:
+                        slots += [None] * (proto.local_count - count)
+                    del stack[len(stack) - count - 1 :]
+                    ip = 0
+                    continue
+
+                if not isinstance(callee, MysticCallable):
+                    raise RTE(
+                        proto.tokens[ip - 2], "Can only call functions and classes."
+                    )
+                if count != callee.arity():
+                    raise RTE(
+                        proto.tokens[ip - 2],
+                        "Expected "
+                        + str(callee.arity())
+                        + " arguments but got "
+                        + str(count)
+                        + ".",
+                    )
+                arguments = stack[len(stack) - count :]
+                del stack[len(stack) - count - 1 :]
+                push(callee.call(interpreter, arguments))
+            elif op == RETURN:
+                value = pop()
+                if not frames:
+                    return value
+                closure, code, constants, upvalues, slots, ip = frames.pop()
+                proto = closure.proto
+                push(value)
+            elif op == GET_UPVALUE:
+                push(upvalues[code[ip]].value)
+                ip += 1
+            elif op == SET_UPVALUE:
+                upvalues[code[ip]].value = stack[-1]
+                ip += 1
+            elif op == GET_CELL:
+                push(slots[code[ip]].value)
+                ip += 1
+            elif op == SET_CELL:
+                slots[code[ip]].value = stack[-1]
+                ip += 1
+            elif op == SET_GLOBAL:
+                globals.assign(constants[code[ip]], stack[-1])
+                ip += 1
+            elif op == NIL:
+                push(None)
+            elif op == TRUE:
+                push(True)
+            elif op == FALSE:
+                push(False)
+            elif op == MULTIPLY:
+                b = pop()
+                a = stack[-1]
+                if type(a) is float and type(b) is float:
+                    stack[-1] = a * b
+                else:
+                    stack[-1] = number.multiply(proto.tokens[ip - 1], a, b)
+            elif op == DIVIDE:
+                b = pop()
+                stack[-1] = number.divide(proto.tokens[ip - 1], stack[-1], b)
+            elif op == GREATER:
+                b = pop()
+                a = stack[-1]
+                if type(a) not in NUMBER_TYPES or type(b) not in NUMBER_TYPES:
+                    raise RTE(proto.tokens[ip - 1], "Operands must be numbers.")
+                stack[-1] = a > b
+            elif op == GREATER_EQUAL:
+                b = pop()
+                a = stack[-1]
+                if type(a) not in NUMBER_TYPES or type(b) not in NUMBER_TYPES:
+                    raise RTE(proto.tokens[ip - 1], "Operands must be numbers.")
+                stack[-1] = a >= b
+            elif op == EQUAL:
+                b = pop()
+                a = stack[-1]
+                if type(a) not in NUMBER_TYPES or type(b) not in NUMBER_TYPES:
+                    raise RTE(proto.tokens[ip - 1], "Operands must be numbers.")
+                stack[-1] = a == b
+            elif op == NOT_EQUAL:
+                b = pop()
+                a = stack[-1]
+                if type(a) not in NUMBER_TYPES or type(b) not in NUMBER_TYPES:
+                    raise RTE(proto.tokens[ip - 1], "Operands must be numbers.")
+                stack[-1] = a != b
+            elif op == NEGATE:
+                a = stack[-1]
+                if type(a) is float:
+                    stack[-1] = -a
+                else:
+                    number.check_operand(proto.tokens[ip - 1], a)
+                    stack[-1] = number.negate(a)
+            elif op == NOT:
+                a = stack[-1]
+                stack[-1] = a is None or a is False or a == 0 or a == ""
+            elif op == JUMP_IF_FALSE_OR_POP:
+                a = stack[-1]
+                if a is None or a is False or a == 0 or a == "":
+                    ip = code[ip]
+                else:
+                    pop()
+                    ip += 1
+            elif op == JUMP_IF_TRUE_OR_POP:
+                a = stack[-1]
+                if a is None or a is False or a == 0 or a == "":
+                    pop()
+                    ip += 1
+                else:
+                    ip = code[ip]
+            elif op == DEFINE_GLOBAL:
+                globals.define(constants[code[ip]].lexeme, pop())
+                ip += 1
+            elif op == DEFINE_CELL:
+                slots[code[ip]] = Cell(pop())
+                ip += 1
+            elif op == NEW_CELL:
+                slots[code[ip]] = Cell()
+                ip += 1
+            elif op == BOX:
+                slots[code[ip]] = Cell(slots[code[ip]])
+                ip += 1
+            elif op == CLOSURE:
+                function = constants[code[ip]]
+                ip += 1
+                new_closure = VMClosure(
+                    function,
+                    [
+                        slots[index] if is_local else upvalues[index]
+                        for is_local, index in function.upvalues
+                    ],
+                    self,
+                )
+                if function.memoized:
+                    new_closure = MemoizedFunction(new_closure, interpreter.memo_size)
+                push(new_closure)
+            elif op == PRINT:
+                print(stringify(pop()))
+            elif op == ECHO:
+                print(stringify(pop()))
+            else:
+                raise RuntimeError(f"Unknown opcode {op}.")
+
+
+class VMInterpreter(Interpreter):
+    """Interpreter backend that compiles to bytecode and runs it on the VM."""
+
+    def __init__(self, mystic):
+        super().__init__(mystic)
+        self.__mystic = mystic
+        self.vm = VM(self)
+
+    def interpret(self, statements):
+        try:
+            proto = BytecodeCompiler(self.__mystic.is_repl).compile(statements)
+            self.vm.run(VMClosure(proto, [], self.vm), [])
+        except RTE as e:
+            self.__mystic.runtime_error(e)
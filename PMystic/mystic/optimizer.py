@@ -0,0 +1,198 @@
+from expr import Expr
+from stmt import Stmt
+from token_type import TokenType
+from runtime_error import RTE
+from mystic_truth import is_truthy
+from ast_fields import fields
+
+
+class Optimizer(Stmt.Visitor, Expr.Visitor):
+    """
+    Simplifies a resolved program before an engine prepares it. Operators
+    whose operands are all literals are evaluated once, with the
+    interpreter's own handlers so the result is the one the program would
+    have computed; one that raises is left in place to raise at run time.
+    Ternaries, logical operators and ifs with a literal condition are
+    replaced by the branch that runs, and groupings by what they contain.
+
+    Only nodes are removed, so every slot and depth the resolver assigned
+    stays valid.
+    """
+
+    def __init__(self, interpreter):
+        self.__interpreter = interpreter
+        self.__binary_handlers = interpreter.binary_handlers
+        self.__unary_handlers = interpreter.unary_handlers
+        # Nodes removed from every program optimized so far.
+        self.removed = 0
+
+    def optimize(self, statements):
+        before = self.__size(statements)
+        statements = self.__statements(statements)
+        self.removed += before - self.__size(statements)
+        return statements
+
+    # ------- Helper Functions ------- #
+
+    def __expr(self, expr):
+        return expr.accept(self)
+
+    def __statements(self, statements):
+        """Optimize a statement list, dropping statements that never run."""
+        optimized = []
+        for stmt in statements:
+            stmt = stmt.accept(self)
+            if stmt is not None:
+                optimized.append(stmt)
+        return optimized
+
+    def __branch(self, stmt):
+        """Optimize a statement that has to stay one, such as a loop body."""
+        stmt = stmt.accept(self)
+        if stmt is None:
+            stmt = Stmt.Block([])
+            stmt.local_count = 0
+            stmt.captured = frozenset()
+        return stmt
+
+    def __size(self, node):
+        """Number of Expr and Stmt nodes in node, a node or a list of them."""
+        if type(node) is list:
+            return sum(self.__size(child) for child in node)
+        if not hasattr(node, "accept"):
+            return 0
+        return 1 + sum(self.__size(getattr(node, field)) for field in fields(node))
+
+    def __fold(self, handler, *operands):
+        """A literal of handler's result, or None if it raises."""
+        try:
+            return Expr.Literal(handler(self.__interpreter, *operands))
+        except RTE:
+            return None
+
+    # ------- Statements ------- #
+
+    def visit_block_stmt(self, stmt):
+        stmt.statements = self.__statements(stmt.statements)
+        return stmt
+
+    def visit_break_stmt(self, stmt):
+        return stmt
+
+    def visit_continue_stmt(self, stmt):
+        return stmt
+
+    def visit_expression_stmt(self, stmt):
+        stmt.expression = self.__expr(stmt.expression)
+        return stmt
+
+    def visit_function_stmt(self, stmt):
+        stmt.body = self.__statements(stmt.body)
+        return stmt
+
+    def visit_for_stmt(self, stmt):
+        if stmt.initializer is not None:
+            stmt.initializer = stmt.initializer.accept(self)
+        stmt.condition = self.__expr(stmt.condition)
+        if stmt.increment is not None:
+            stmt.increment = self.__expr(stmt.increment)
+        stmt.body = self.__branch(stmt.body)
+        return stmt
+
+    def visit_if_stmt(self, stmt):
+        condition = self.__expr(stmt.condition)
+        if type(condition) is Expr.Literal:
+            if is_truthy(condition.value):
+                return stmt.then_branch.accept(self)
+            if stmt.else_branch is not None:
+                return stmt.else_branch.accept(self)
+            return None
+
+        stmt.condition = condition
+        stmt.then_branch = self.__branch(stmt.then_branch)
+        if stmt.else_branch is not None:
+            stmt.else_branch = stmt.else_branch.accept(self)
+        return stmt
+
+    def visit_print_stmt(self, stmt):
+        stmt.expression = self.__expr(stmt.expression)
+        return stmt
+
+    def visit_return_stmt(self, stmt):
+        if stmt.value is not None:
+            stmt.value = self.__expr(stmt.value)
+        return stmt
+
+    def visit_var_stmt(self, stmt):
+        if stmt.initializer is not None:
+            stmt.initializer = self.__expr(stmt.initializer)
+        return stmt
+
+    def visit_while_stmt(self, stmt):
+        stmt.condition = self.__expr(stmt.condition)
+        stmt.body = self.__branch(stmt.body)
+        return stmt
+
+    # ------- Expressions ------- #
+
+    def visit_assign_expr(self, expr):
+        expr.value = self.__expr(expr.value)
+        return expr
+
+    def visit_ternary_expr(self, expr):
+        condition = self.__expr(expr.condition)
+        if type(condition) is Expr.Literal:
+            if is_truthy(condition.value):
+                return self.__expr(expr.true_expr)
+            return self.__expr(expr.false_expr)
+
+        expr.condition = condition
+        expr.true_expr = self.__expr(expr.true_expr)
+        expr.false_expr = self.__expr(expr.false_expr)
+        return expr
+
+    def visit_binary_expr(self, expr):
+        left = expr.left = self.__expr(expr.left)
+        right = expr.right = self.__expr(expr.right)
+        handler = self.__binary_handlers.get(expr.operator.token_type)
+        if (
+            handler is not None
+            and type(left) is Expr.Literal
+            and type(right) is Expr.Literal
+        ):
+            return self.__fold(handler, expr.operator, left.value, right.value) or expr
+        return expr
+
+    def visit_call_expr(self, expr):
+        expr.callee = self.__expr(expr.callee)
+        expr.arguments = [self.__expr(argument) for argument in expr.arguments]
+        return expr
+
+    def visit_grouping_expr(self, expr):
+        return self.__expr(expr.expression)
+
+    def visit_literal_expr(self, expr):
+        return expr
+
+    def visit_logical_expr(self, expr):
+        left = self.__expr(expr.left)
+        if type(left) is Expr.Literal:
+            # `or` yields a truthy left operand and `and` a falsy one
+            # without evaluating the right.
+            if is_truthy(left.value) == (expr.operator.token_type == TokenType.OR):
+                return left
+            return self.__expr(expr.right)
+
+        expr.left = left
+        expr.right = self.__expr(expr.right)
+        return expr
+
+    def visit_unary_expr(self, expr):
+        right = expr.right = self.__expr(expr.right)
+        handler = self.__unary_handlers.get(expr.operator.token_type)
+        if handler is not None and type(right) is Expr.Literal:
+            return self.__fold(handler, expr.operator, right.value) or expr
+        return expr
+
+    def visit_variable_expr(self, expr):
+        return expr
@@ -0,0 +1,633 @@
+import marshal
+import math
+from expr import Expr
+from stmt import Stmt
+from token_type import TokenType
+from runtime_error import RTE
+from environment import Cell
+from mystic_callable import MysticCallable
+from mystic_interpreter import Interpreter
+from mystic_memo import MemoizedFunction
+from mystic_return import TailCall
+from mystic_token import Token
+
+
+class PythonFunction(MysticCallable):
+    __slots__ = ("name", "params", "function")
+
+    def __init__(self, name, params, function):
+        self.name = name
+        self.params = params
+        self.function = function
+
+    def arity(self):
+        return self.params
+
+    def call(self, interpreter, arguments):
+        value = self.function(*arguments)
+        while type(value) is TailCall:
+            value = value.function(*value.arguments)
+        return value
+
+    def __str__(self):
+        return f"<fn {self.name}>"
+
+
+class PythonProgram:
+    """
+    Transpiled program: the code object of the generated module plus the
+    constants (tokens and odd literals) it refers to as _k0, _k1, ... and,
+    for each line of its source, the token errors on that line report.
+    Code objects do not pickle, so they are marshalled for the cache.
+    """
+
+    __slots__ = ("code", "constants", "source", "tokens")
+
+    def __init__(self, code, constants, source, tokens):
+        self.code = code
+        self.constants = constants
+        self.source = source
+        self.tokens = tokens
+
+    def __reduce__(self):
+        return (
+            PythonProgram.load,
+            (marshal.dumps(self.code), self.constants, self.source, self.tokens),
+        )
+
+    @staticmethod
+    def load(code, constants, source, tokens):
+        return PythonProgram(marshal.loads(code), constants, source, tokens)
+
+
+class PythonTranspiler(Expr.Visitor, Stmt.Visitor):
+    """
+    Translates resolved statements into Python source. Each Mystic function
+    becomes a module-level factory that receives the Cells it captures and
+    returns a plain Python function, and top-level code becomes _main(), so
+    locals, loops and calls all run on CPython's own bytecode. Statements
+    return nothing and append lines; expressions return Python source.
+    """
+
+    class FunctionState:
+        def __init__(self, enclosing, indent):
+            self.enclosing = enclosing
+            self.indent = indent
+            self.lines = []
+            # Token last made a constant before each line was emitted.
+            self.tokens = []
+            # (base slot, captured slots) for every open resolver scope.
+            self.scopes = []
+            self.next_slot = 0
+            # Cell expressions in the enclosing function, one per upvalue.
+            self.upvalues = {}
+            self.temps = 0
+            # Increment of every open loop and the number of scopes open
+            # around it, or None for while loops.
+            self.loops = []
+
+    def __init__(self, echo: bool = False):
+        self.__echo = echo
+        self.__function = None
+        self.__factories = []
+        self.__constants = []
+        self.__token = None
+
+    def transpile(self, statements):
+        """
+        Return the generated module source, its constants and the token of
+        each of its lines.
+        """
+        self.__function = self.FunctionState(None, 1)
+        for statement in statements:
+            self.__statement(statement)
+
+        lines = []
+        tokens = []
+        for factory, factory_tokens in self.__factories:
+            lines.extend(factory)
+            tokens.extend(factory_tokens)
+        lines.append("def _main():")
+        lines.extend(self.__function.lines)
+        lines.append("    return None")
+        tokens.append(None)
+        tokens.extend(self.__function.tokens)
+        tokens.append(None)
+
+        # Lines that mention no token report the last one before them.
+        for index, token in enumerate(tokens):
+            if token is None and index > 0:
+                tokens[index] = tokens[index - 1]
+        return "\n".join(lines) + "\n", self.__constants, tokens
+
+    # ------- Helper Functions ------- #
+
+    def __statement(self, stmt):
+        stmt.accept(self)
+
+    def __expr(self, expr):
+        return expr.accept(self)
+
+    def __emit(self, line):
+        self.__function.lines.append("    " * self.__function.indent + line)
+        self.__function.tokens.append(self.__token)
+
+    def __body(self, stmt):
+        """Emit stmt as an indented suite, which Python needs to be non-empty."""
+        function = self.__function
+        function.indent += 1
+        start = len(function.lines)
+        self.__statement(stmt)
+        if len(function.lines) == start:
+            self.__emit("pass")
+        function.indent -= 1
+
+    def __constant(self, value):
+        if type(value) is Token:
+            self.__token = value
+        self.__constants.append(value)
+        return f"_k{len(self.__constants) - 1}"
+
+    def __temp(self):
+        self.__function.temps += 1
+        return f"_t{self.__function.temps}"
+
+    def __truthy(self, name, value):
+        """Inline Mystic truthiness of value, kept in the temporary name."""
+        return (
+            f"(({name} := {value}) is True or {name} is not False"
+            f' and {name} is not None and {name} != 0 and {name} != "")'
+        )
+
+    def __begin_scope(self, size, captured):
+        function = self.__function
+        function.scopes.append((function.next_slot, captured))
+        function.next_slot += size
+
+    def __end_scope(self):
+        base, _ = self.__function.scopes.pop()
+        self.__function.next_slot = base
+
+    def __local(self, function, depth, slot, name):
+        """Python name and captured flag of a local of function, or None."""
+        if depth >= len(function.scopes):
+            return None
+        base, captured = function.scopes[-1 - depth]
+        return f"{name}_{base + slot}", slot in captured
+
+    def __upvalue(self, function, depth, slot, name):
+        """Factory parameter of function holding the Cell for (depth, slot)."""
+        depth -= len(function.scopes)
+        enclosing = function.enclosing
+        local = self.__local(enclosing, depth, slot, name)
+        if local is not None:
+            source = local[0]
+        else:
+            source = self.__upvalue(enclosing, depth, slot, name)
+        return function.upvalues.setdefault(source, f"_u{len(function.upvalues)}")
+
+    def __variable(self, expr):
+        """Python name of expr's variable and whether it holds a Cell."""
+        local = self.__local(self.__function, expr.depth, expr.slot, expr.name.lexeme)
+        if local is None:
+            cell = self.__upvalue(
+                self.__function, expr.depth, expr.slot, expr.name.lexeme
+            )
+            return cell, True
+        return local
+
+    def __declare(self, stmt, value):
+        if stmt.slot is None:
+            self.__emit(f"define_global({stmt.name.lexeme!r}, {value})")
+            return
+
+        base, captured = self.__function.scopes[-1]
+        name = f"{stmt.name.lexeme}_{base + stmt.slot}"
+        if stmt.slot in captured:
+            self.__emit(f"{name} = Cell({value})")
+        else:
+            self.__emit(f"{name} = {value}")
+
+    # ------- Statements ------- #
+
+    def visit_block_stmt(self, stmt):
+        if stmt.local_count == 0:
+            for statement in stmt.statements:
+                self.__statement(statement)
+            return
+
+        self.__begin_scope(stmt.local_count, stmt.captured)
+        for statement in stmt.statements:
+            self.__statement(statement)
+        self.__end_scope()
+
+    def visit_break_stmt(self, stmt):
+        self.__emit("break")
+
+    def visit_continue_stmt(self, stmt):
+        # A for loop's increment still runs before its next iteration, in
+        # the loop's scope rather than that of the blocks continue is in.
+        function = self.__function
+        loop = function.loops[-1]
+        if loop is not None:
+            increment, depth = loop
+            scopes = function.scopes
+            function.scopes = scopes[:depth]
+            self.__emit(self.__expr(increment))
+            function.scopes = scopes
+        self.__emit("continue")
+
+    def visit_expression_stmt(self, stmt):
+        expression = stmt.expression
+        if self.__echo:
+            self.__emit(f"print(stringify({self.__expr(expression)}))")
+            return
+
+        # A bare assignment is the common case and needs no value.
+        if type(expression) is Expr.Assign and expression.depth is not None:
+            value = self.__expr(expression.value)
+            target, is_cell = self.__variable(expression)
+            if is_cell:
+                target += ".value"
+            self.__emit(f"{target} = {value}")
+            return
+
+        self.__emit(self.__expr(expression))
+
+    def visit_for_stmt(self, stmt):
+        if stmt.local_count != 0:
+            self.__begin_scope(stmt.local_count, stmt.captured)
+        if stmt.initializer is not None:
+            self.__statement(stmt.initializer)
+
+        function = self.__function
+        condition = self.__expr(stmt.condition)
+        self.__emit(f"while {self.__truthy(self.__temp(), condition)}:")
+        if stmt.increment is None:
+            function.loops.append(None)
+        else:
+            function.loops.append((stmt.increment, len(function.scopes)))
+        function.indent += 1
+        start = len(function.lines)
+        self.__statement(stmt.body)
+        if stmt.increment is not None:
+            self.__emit(self.__expr(stmt.increment))
+        elif len(function.lines) == start:
+            self.__emit("pass")
+        function.indent -= 1
+        function.loops.pop()
+
+        if stmt.local_count != 0:
+            self.__end_scope()
+
+    def visit_function_stmt(self, stmt):
+        enclosing = self.__function
+        function = self.FunctionState(enclosing, 2)
+        self.__function = function
+
+        self.__begin_scope(stmt.local_count, stmt.captured)
+        params = []
+        for slot, param in enumerate(stmt.params):
+            params.append(f"{param.lexeme}_{slot}")
+            if slot in stmt.captured:
+                self.__emit(f"{params[-1]} = Cell({params[-1]})")
+        for statement in stmt.body:
+            self.__statement(statement)
+        self.__end_scope()
+        self.__function = enclosing
+
+        factory = f"_make_{stmt.name.lexeme}_{len(self.__factories)}"
+        cells = list(function.upvalues)
+        self.__factories.append(
+            (
+                [
+                    f"def {factory}({', '.join(function.upvalues.values())}):",
+                    f"    def fn_{stmt.name.lexeme}({', '.join(params)}):",
+                    *function.lines,
+                    "        return None",
+                    f"    return fn_{stmt.name.lexeme}",
+                ],
+                [None, None, *function.tokens, None, None],
+            )
+        )
+        value = (
+            f"Function({stmt.name.lexeme!r}, {len(stmt.params)},"
+            f" {factory}({', '.join(cells)}))"
+        )
+        if stmt.memoized:
+            value = f"Memoized({value}, memo_size)"
+
+        # A function that can see its own name needs that cell before the
+        # factory is called.
+        if stmt.slot is not None:
+            base, captured = enclosing.scopes[-1]
+            if stmt.slot in captured:
+                name = f"{stmt.name.lexeme}_{base + stmt.slot}"
+                self.__emit(f"{name} = Cell()")
+                self.__emit(f"{name}.value = {value}")
+                return
+
+        self.__declare(stmt, value)
+
+    def visit_if_stmt(self, stmt):
+        condition = self.__expr(stmt.condition)
+        self.__emit(f"if {self.__truthy(self.__temp(), condition)}:")
+        self.__body(stmt.then_branch)
+        if stmt.else_branch is not None:
+            self.__emit("else:")
+            self.__body(stmt.else_branch)
+
+    def visit_print_stmt(self, stmt):
+        self.__emit(f"print(stringify({self.__expr(stmt.expression)}))")
+
+    def visit_return_stmt(self, stmt):
+        if stmt.value is None:
+            self.__emit("return None")
+        elif stmt.tail_call:
+            # The caller makes the call once this function has returned, so
+            # tail calls run in constant Python stack.
+            function, arguments = self.__callee(stmt.value)
+            self.__emit(f"return TailCall({function}, ({arguments}))")
+        else:
+            self.__emit(f"return {self.__expr(stmt.value)}")
+
+    def visit_var_stmt(self, stmt):
+        if stmt.initializer is None:
+            self.__declare(stmt, "None")
+        else:
+            self.__declare(stmt, self.__expr(stmt.initializer))
+
+    def visit_while_stmt(self, stmt):
+        condition = self.__expr(stmt.condition)
+        self.__emit(f"while {self.__truthy(self.__temp(), condition)}:")
+        self.__function.loops.append(None)
+        self.__body(stmt.body)
+        self.__function.loops.pop()
+
+    # ------- Expressions ------- #
+
+    def visit_assign_expr(self, expr):
+        value = self.__expr(expr.value)
+        if expr.depth is None:
+            return f"assign_global({self.__constant(expr.name)}, {value})"
+
+        target, is_cell = self.__variable(expr)
+        if is_cell:
+            return f"set_cell({target}, {value})"
+        return f"({target} := {value})"
+
+    def visit_variable_expr(self, expr):
+        if expr.depth is None:
+            return f"get_global({self.__constant(expr.name)})"
+
+        name, is_cell = self.__variable(expr)
+        return f"{name}.value" if is_cell else name
+
+    def visit_literal_expr(self, expr):
+        value = expr.value
+        # Generated arithmetic is already native float code, so integral
+        # literals are emitted as floats instead of paying for range checks.
+        if type(value) is int:
+            value = float(value)
+        if type(value) is float and not math.isfinite(value):
+            return self.__constant(value)
+        return repr(value)
+
+    def visit_grouping_expr(self, expr):
+        return f"({self.__expr(expr.expression)})"
+
+    def visit_logical_expr(self, expr):
+        value = self.__temp()
+        truthy = self.__truthy(value, self.__expr(expr.left))
+        right = self.__expr(expr.right)
+
+        if expr.operator.token_type == TokenType.OR:
+            return f"({value} if {truthy} else {right})"
+        return f"({right} if {truthy} else {value})"
+
+    def visit_ternary_expr(self, expr):
+        condition = self.__truthy(self.__temp(), self.__expr(expr.condition))
+        return (
+            f"({self.__expr(expr.true_expr)} if {condition}"
+            f" else {self.__expr(expr.false_expr)})"
+        )
+
+    def visit_unary_expr(self, expr):
+        right = self.__expr(expr.right)
+        operator = expr.operator
+
+        if operator.token_type == TokenType.MINUS:
+            value = self.__temp()
+            token = self.__constant(operator)
+            return (
+                f"(-{value} if type({value} := {right}) is float"
+                f" else operand_error({token}))"
+            )
+
+        if operator.token_type == TokenType.BANG:
+            return f"(not {self.__truthy(self.__temp(), right)})"
+
+        return "None"
+
+    def visit_binary_expr(self, expr):
+        left = self.__expr(expr.left)
+        right = self.__expr(expr.right)
+        token_type = expr.operator.token_type
+        a = self.__temp()
+        b = self.__temp()
+        # Chaining makes Python evaluate both operands before any check.
+        operands = f"type({a} := {left}) is type({b} := {right})"
+
+        if token_type == TokenType.PLUS:
+            return f"({a} + {b} if {operands} in addable else add({a}, {b}))"
+
+        token = self.__constant(expr.operator)
+        if token_type == TokenType.SLASH:
+            return (
+                f"({a} / {b} if {operands} is float and {b}"
+                f" else divide({a}, {b}, {token}))"
+            )
+
+        operator = self.python_operators.get(token_type)
+        if operator is None:
+            return "None"
+        return (
+            f"({a} {operator} {b} if {operands} is float"
+            f" else operands_error({token}))"
+        )
+
+    def visit_numeric_expr(self, expr):
+        # Numbers are floats here, so operands known to be numbers need no
+        # checks, except for division by zero.
+        if expr.operator.token_type == TokenType.SLASH:
+            return self.visit_binary_expr(expr)
+        left = self.__expr(expr.left)
+        right = self.__expr(expr.right)
+        operator = "+"
+        if expr.operator.token_type != TokenType.PLUS:
+            operator = self.python_operators[expr.operator.token_type]
+        return f"({left} {operator} {right})"
+
+    def visit_concat_expr(self, expr):
+        return f"({self.__expr(expr.left)} + {self.__expr(expr.right)})"
+
+    python_operators = {
+        TokenType.MINUS: "-",
+        TokenType.STAR: "*",
+        TokenType.GREATER: ">",
+        TokenType.GREATER_EQUAL: ">=",
+        TokenType.LESS: "<",
+        TokenType.LESS_EQUAL: "<=",
+        TokenType.EQUAL_EQUAL: "==",
+        TokenType.BANG_EQUAL: "!=",
+    }
+
+    def visit_call_expr(self, expr):
+        function, arguments = self.__callee(expr)
+        # A Mystic function called directly may return a tail call.
+        value = self.__temp()
+        return (
+            f"({value} if type({value} := {function}({arguments})) is not TailCall"
+            f" else trampoline({value}))"
+        )
+
+    def __callee(self, expr):
+        """The Python function a call runs, and its arguments as source."""
+        callee = self.__temp()
+        function = self.__expr(expr.callee)
+        arguments = "".join(self.__expr(argument) + ", " for argument in expr.arguments)
+        count = len(expr.arguments)
+        paren = self.__constant(expr.paren)
+        # Mystic functions are called directly; anything else goes through
+        # call(), which checks the callee once the arguments are evaluated.
+        function = (
+            f"({callee}.function if type({callee} := {function}) is Function"
+            f" and {callee}.params == {count}"
+            f" else call({callee}, {paren}))"
+        )
+        return function, arguments
+
+
+class PythonInterpreter(Interpreter):
+    """Interpreter backend that transpiles each program to Python and execs it."""
+
+    cache_suffix = ".mystpy"
+
+    def __init__(self, mystic):
+        super().__init__(mystic)
+        self.__mystic = mystic
+        self.__runtime = self.__make_runtime()
+
+    def __make_runtime(self):
+        stringify = self._stringify
+        globals = self.globals
+        interpreter = self
+
+        def operand_error(token):
+            raise RTE(token, "Operand must be a number.")
+
+        def operands_error(token):
+            raise RTE(token, "Operands must be numbers.")
+
+        def divide(a, b, token):
+            if type(a) is not float or type(b) is not float:
+                raise RTE(token, "Operands must be numbers.")
+            raise RTE(token, "Cannot divide by zero.")
+
+        def add(a, b):
+            if type(a) is float and type(b) is str:
+                return stringify(a) + b
+            if type(a) is str and type(b) is float:
+                return a + stringify(b)
+            return None
+
+        def assign_global(name, value):
+            globals.assign(name, value)
+            return value
+
+        def set_cell(cell, value):
+            cell.value = value
+            return value
+
+        def trampoline(value):
+            while type(value) is TailCall:
+                value = value.function(*value.arguments)
+            return value
+
+        def call(callee, paren):
+            def checked_call(*arguments):
+                if not isinstance(callee, MysticCallable):
+                    raise RTE(paren, "Can only call functions and classes.")
+                if len(arguments) != callee.arity():
+                    raise RTE(
+                        paren,
+                        "Expected "
+                        + str(callee.arity())
+                        + " arguments but got "
+                        + str(len(arguments))
+                        + ".",
+                    )
+                return callee.call(interpreter, list(arguments))
+
+            return checked_call
+
+        return {
+            "__builtins__": {"print": print, "type": type, "float": float},
+            "Cell": Cell,
+            "Function": PythonFunction,
+            "Memoized": MemoizedFunction,
+            "memo_size": self.memo_size,
+            "addable": (float, str),
+            "stringify": stringify,
+            "get_global": globals.get,
+            "define_global": globals.define,
+            "assign_global": assign_global,
+            "set_cell": set_cell,
+            "operand_error": operand_error,
+            "operands_error": operands_error,
+            "divide": divide,
+            "add": add,
+            "call": call,
+            "TailCall": TailCall,
+            "trampoline": trampoline,
+        }
+
+    def prepare(self, statements):
+        source, constants, tokens = PythonTranspiler(self.__mystic.is_repl).transpile(
+            statements
+        )
+        return PythonProgram(
+            compile(source, "<mystic>", "exec"), constants, source, tokens
+        )
+
+    def interpret(self, program):
+        if type(program) is not PythonProgram:
+            program = self.prepare(program)
+
+        namespace = dict(self.__runtime)
+        for index, constant in enumerate(program.constants):
+            namespace[f"_k{index}"] = constant
+
+        try:
+            exec(program.code, namespace)
+            namespace["_main"]()
+        except RTE as e:
+            self.__mystic.runtime_error(e)
+        except RecursionError as e:
+            self.__mystic.runtime_error(
+                RTE(self.__token_at(program, e), "Stack overflow.")
+            )
+
+    def __token_at(self, program, error):
+        """Token of the innermost generated line the traceback of error is in."""
+        line = None
+        traceback = error.__traceback__
+        while traceback is not None:
+            if traceback.tb_frame.f_code.co_filename == "<mystic>":
+                line = traceback.tb_lineno
+            traceback = traceback.tb_next
+        token = None if line is None else program.tokens[line - 1]
+        if token is None:
+            # Only calls overflow the stack, and every call has a token.
+            token = next(token for token in program.tokens if token is not None)
+        return token
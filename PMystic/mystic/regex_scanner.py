@@ -0,0 +1,105 @@
+import re
+from sys import intern
+from token_type import *
+from mystic_token import Token
+from scanner import Scanner
+
+
+class RegexScanner:
+    """
+    Single-pass scanner that recognizes whole lexemes with one compiled
+    master regex instead of dispatching on every character. It produces the
+    same token stream, literals and line numbers as Scanner.
+    """
+
+    keywords = Scanner.keywords
+
+    # Operator lexeme -> (token type, lexeme, literal), mirroring
+    # Scanner.__scan_token. Tokens share the lexeme strings stored here.
+    operators = {
+        "(": (TokenType.LEFT_PAREN, "(", "("),
+        ")": (TokenType.RIGHT_PAREN, ")", ")"),
+        "{": (TokenType.LEFT_BRACE, "{", "{"),
+        "}": (TokenType.RIGHT_BRACE, "}", "}"),
+        ",": (TokenType.COMMA, ",", ","),
+        ".": (TokenType.DOT, ".", "."),
+        "-": (TokenType.MINUS, "-", "-"),
+        "+": (TokenType.PLUS, "+", "+"),
+        ";": (TokenType.SEMICOLON, ";", ";"),
+        "*": (TokenType.STAR, "*", "*"),
+        "/": (TokenType.SLASH, "/", "/"),
+        "?": (TokenType.QUESTION, "?", "?"),
+        ":": (TokenType.COLON, ":", ":"),
+        "!": (TokenType.BANG, "!", "!="),
+        "!=": (TokenType.BANG_EQUAL, "!=", "!="),
+        "=": (TokenType.EQUAL, "=", "=="),
+        "==": (TokenType.EQUAL_EQUAL, "==", "=="),
+        "<": (TokenType.LESS, "<", "<="),
+        "<=": (TokenType.LESS_EQUAL, "<=", "<="),
+        ">": (TokenType.GREATER, ">", ">="),
+        ">=": (TokenType.GREATER_EQUAL, ">=", ">="),
+    }
+
+    pattern = re.compile(
+        r"""
+        [ \t\r]*
+        (?:
+            (?P<identifier>[A-Za-z_][A-Za-z0-9_]*)
+          | (?P<operator>[!=<>]=?|[(){},.\-+;*?:]|/(?![/*]))
+          | (?P<newline>\n)
+          | (?P<number>[0-9]+(?:\.[0-9]+)?)
+          | (?P<string>"[^"]*")
+          | (?P<comment>//[^\n]*)
+          | (?P<block_comment>/\*.*?\*/)
+          | (?P<open_string>".*)
+          | (?P<open_comment>/\*.*)
+          | (?P<error>.)
+        )
+        """,
+        re.VERBOSE | re.DOTALL,
+    )
+
+    def __init__(self, source: str, mystic: object):
+        self.__source = source
+        self.__mystic = mystic
+
+    def scan_tokens(self) -> list:
+        return list(self.tokens())
+
+    def tokens(self):
+        """Yield tokens lazily, ending with EOF, so a parser can start early."""
+        keywords = self.keywords
+        operators = self.operators
+        line = 1
+
+        for match in self.pattern.finditer(self.__source):
+            kind = match.lastgroup
+            text = match.group(kind)
+
+            if kind == "identifier":
+                # Interned so Environment lookups by name hit on identity.
+                text = intern(text)
+                yield Token(keywords.get(text, TokenType.IDENTIFIER), text, text, line)
+            elif kind == "operator":
+                yield Token(*operators[text], line)
+            elif kind == "newline":
+                line += 1
+            elif kind == "number":
+                yield Token(TokenType.NUMBER, text, Scanner.parse_number(text), line)
+            elif kind == "string":
+                line += text.count("\n")
+                yield Token(TokenType.STRING, text, text[1:-1], line)
+            elif kind == "comment":
+                pass
+            elif kind == "block_comment":
+                line += text.count("\n")
+            elif kind == "open_string":
+                line += text.count("\n")
+                self.__mystic.error(line, "Unterminated string.")
+            elif kind == "open_comment":
+                line += text.count("\n")
+                self.__mystic.error(line, "Unterminated comment.")
+            else:
+                self.__mystic.error(line, "Unexpected character.")
+
+        yield Token(TokenType.EOF, "", None, line)
@@ -7,6 +7,12 @@ from enum import Enum
 class Resolver(Stmt.Visitor, Expr.Visitor):
     def __init__(self, mystic):
         self.scopes = deque()
+        self.__slots = deque()
+        self.__captured = deque()
+        self.__references = deque()
+        self.__functions = deque()
+        self.__scope_functions = deque()
+        self.__function_level = 0
         self.__mystic = mystic
         self.__curr_function = self.FunctionType.NONE
         self.__curr_loop = self.LoopType.NONE
@@ -26,6 +32,14 @@ class Resolver(Stmt.Visitor, Expr.Visitor):
     def __resolve_function(self, stmt, type):
         enclosing_func = self.__curr_function
         self.__curr_function = type
+        self.__function_level += 1
+        # The function's own scope and the free variables it captures, each
+        # keyed by where the enclosing code finds it and valued by index.
+        free = {}
+        self.__functions.append((stmt, len(self.scopes), free))
+        # Cleared unless the body declares a function, which could keep the
+        # call's scope alive after it returns.
+        stmt.escapes = False
 
         self.__begin_scope()
 
@@ -34,8 +48,11 @@ class Resolver(Stmt.Visitor, Expr.Visitor):
             self.__define(param)
 
         self.resolve(stmt.body)
-        self.__end_scope()
+        self.__end_scope(stmt)
+        self.__functions.pop()
+        stmt.free = tuple(free)
 
+        self.__function_level -= 1
         self.__curr_function = enclosing_func
 
     def __resolve_loop(self, stmt, type):
@@ -48,15 +65,25 @@ class Resolver(Stmt.Visitor, Expr.Visitor):
         self.__curr_loop = enclosing_loop
 
     def visit_block_stmt(self, stmt):
+        # A block that declares nothing gets no scope of its own and runs in
+        # the enclosing one; engines recognise it by its zero local_count.
+        if not any(type(s) in self.declarations for s in stmt.statements):
+            self.resolve(stmt.statements)
+            stmt.local_count = 0
+            stmt.captured = frozenset()
+            return
+
         self.__begin_scope()
         self.resolve(stmt.statements)
-        self.__end_scope()
+        self.__end_scope(stmt)
+
+    declarations = (Stmt.Var, Stmt.Function)
 
     def visit_if_stmt(self, stmt):
         self.__resolve_expr(stmt.condition)
         self.__resolve_statement(stmt.then_branch)
         if stmt.else_branch is not None:
-            self.resolve(stmt.else_branch)
+            self.__resolve_statement(stmt.else_branch)
 
     def visit_print_stmt(self, stmt):
         self.__resolve_expr(stmt.expression)
@@ -68,17 +95,24 @@ class Resolver(Stmt.Visitor, Expr.Visitor):
         if stmt.value is not None:
             self.__resolve_expr(stmt.value)
 
+        # A call whose value is returned as-is can reuse the caller's frame.
+        stmt.tail_call = type(stmt.value) is Expr.Call
+
     def visit_expression_stmt(self, stmt):
         self.__resolve_expr(stmt.expression)
 
     def visit_function_stmt(self, stmt):
-        self.__declare(stmt.name)
+        stmt.slot = self.__declare(stmt.name)
+        self.__reference(stmt)
+        if self.__functions:
+            self.__functions[-1][0].escapes = True
         self.__define(stmt.name)
 
         self.__resolve_function(stmt, self.FunctionType.FUNCTION)
 
     def visit_var_stmt(self, stmt):
-        self.__declare(stmt.name)
+        stmt.slot = self.__declare(stmt.name)
+        self.__reference(stmt)
         if stmt.initializer is not None:
             self.__resolve_expr(stmt.initializer)
         self.__define(stmt.name)
@@ -86,6 +120,24 @@ class Resolver(Stmt.Visitor, Expr.Visitor):
     def visit_while_stmt(self, stmt):
         self.__resolve_loop(stmt, self.LoopType.LOOP)
 
+    def visit_for_stmt(self, stmt):
+        # A counter the loop declares lives in a scope around the whole loop.
+        scoped = type(stmt.initializer) is Stmt.Var
+        if scoped:
+            self.__begin_scope()
+
+        if stmt.initializer is not None:
+            self.__resolve_statement(stmt.initializer)
+        self.__resolve_loop(stmt, self.LoopType.LOOP)
+        if stmt.increment is not None:
+            self.__resolve_expr(stmt.increment)
+
+        if scoped:
+            self.__end_scope(stmt)
+        else:
+            stmt.local_count = 0
+            stmt.captured = frozenset()
+
     def visit_break_stmt(self, stmt):
         if self.__curr_loop == self.LoopType.NONE:
             self.__mystic.error(stmt.keyword, "'break' outside loop")
@@ -100,8 +152,8 @@ class Resolver(Stmt.Visitor, Expr.Visitor):
 
     def visit_ternary_expr(self, expr):
         self.__resolve_expr(expr.condition)
-        self.__resolve_expr(expr.then_branch)
-        self.__resolve_expr(expr.else_branch)
+        self.__resolve_expr(expr.true_expr)
+        self.__resolve_expr(expr.false_expr)
 
     def visit_binary_expr(self, expr):
         self.__resolve_expr(expr.left)
@@ -139,13 +191,29 @@ class Resolver(Stmt.Visitor, Expr.Visitor):
 
     def __begin_scope(self):
         self.scopes.append({})
-
-    def __end_scope(self):
+        self.__slots.append({})
+        self.__captured.append(set())
+        self.__references.append([])
+        self.__scope_functions.append(self.__function_level)
+
+    def __end_scope(self, stmt):
+        """
+        Close the innermost scope, recording on its Block or Function node how
+        many slots it needs and which of them nested functions capture. Nodes
+        that reach those slots from the declaring function learn whether the
+        slot holds a Cell.
+        """
         self.scopes.pop()
+        self.__scope_functions.pop()
+        stmt.local_count = len(self.__slots.pop())
+        stmt.captured = frozenset(self.__captured.pop())
+        for node in self.__references.pop():
+            node.cell = node.slot in stmt.captured
 
     def __declare(self, name):
+        """Declare name in the innermost scope and return its slot index."""
         if len(self.scopes) == 0:
-            return
+            return None
 
         if self.scopes[-1].get(name.lexeme) is not None:
             self.__mystic.error(
@@ -153,6 +221,8 @@ class Resolver(Stmt.Visitor, Expr.Visitor):
             )
 
         self.scopes[-1][name.lexeme] = False
+        slots = self.__slots[-1]
+        return slots.setdefault(name.lexeme, len(slots))
 
     def __define(self, name):
         if len(self.scopes) == 0:
@@ -160,8 +230,35 @@ class Resolver(Stmt.Visitor, Expr.Visitor):
 
         self.scopes[-1][name.lexeme] = True
 
+    def __reference(self, node):
+        # Declarations are filled in when the scope closes, like local reads.
+        if node.slot is not None:
+            self.__references[-1].append(node)
+
     def __resolve_local(self, expr, name):
+        # Unresolved names keep depth None and are looked up as globals.
         for i in range(len(self.scopes) - 1, -1, -1):
             if self.scopes[i].get(name.lexeme) is not None:
-                self.__mystic.interpreter.resolve(expr, len(self.scopes) - 1 - i)
+                expr.depth = len(self.scopes) - 1 - i
+                expr.slot = self.__slots[i][name.lexeme]
+                if self.__scope_functions[i] != self.__function_level:
+                    self.__captured[i].add(expr.slot)
+                    expr.upvalue = self.__free(len(self.__functions) - 1, i, expr.slot)
+                else:
+                    self.__references[i].append(expr)
                 return
+
+    def __free(self, function, scope, slot):
+        """
+        Index of the free variable of the function at depth `function` of the
+        nesting that reaches `slot` of `scope`. Its source is (depth, slot) from
+        where the function is declared when the variable belongs to the
+        enclosing code, or (None, index) for a free variable of the enclosing
+        function, which in turn captures it.
+        """
+        _, base, free = self.__functions[function]
+        if self.__scope_functions[scope] == function:
+            source = (base - 1 - scope, slot)
+        else:
+            source = (None, self.__free(function - 1, scope, slot))
+        return free.setdefault(source, len(free))
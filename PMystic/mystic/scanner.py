@@ -1,5 +1,7 @@
+from sys import intern
 from token_type import *
 from mystic_token import Token
+from mystic_number import parse_integer
 
 
 class Scanner:
@@ -22,6 +24,7 @@ class Scanner:
         "while": TokenType.WHILE,
         "break": TokenType.BREAK,
         "continue": TokenType.CONTINUE,
+        "memo": TokenType.MEMO,
     }
 
     def __init__(self, source: str, mystic: object):
@@ -135,7 +138,7 @@ class Scanner:
     def __identifier(self):
         while self.__is_alpha_numeric(self.__peek()):
             self.__advance()
-        text = self.__source[self.__start : self.__current]
+        text = intern(self.__source[self.__start : self.__current])
         type = None
         if text in self.keywords:
             type = self.keywords[text]
@@ -163,7 +166,7 @@ class Scanner:
 
         self.__add_token(
             TokenType.NUMBER,
-            self.__parse_double(self.__source[self.__start : self.__current]),
+            self.parse_number(self.__source[self.__start : self.__current]),
         )
 
     def __string(self):
@@ -213,7 +216,15 @@ class Scanner:
         else:
             self.__tokens.append(Token(token_type, "", None, self.__line))
 
-    def __parse_double(self, lexeme: str) -> float:
+    @staticmethod
+    def parse_number(lexeme: str):
+        # Literals without a fraction are kept as exact ints.
+        if "." in lexeme:
+            return Scanner.parse_double(lexeme)
+        return parse_integer(lexeme)
+
+    @staticmethod
+    def parse_double(lexeme: str) -> float:
         integer_part = 0
         fractional_part = 0
         fractional_multiplier = 1
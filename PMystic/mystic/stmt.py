@@ -12,6 +12,9 @@ class Stmt:
         def visit_expression_stmt(self, stmt):
             pass
 
+        def visit_for_stmt(self, stmt):
+            pass
+
         def visit_function_stmt(self, stmt):
             pass
 
@@ -30,79 +33,83 @@ class Stmt:
         def visit_while_stmt(self, stmt):
             pass
 
-    def __init__(self):
-        self._block = self.Block
-        self._break = self.Break
-        self._continue = self.Continue
-        self._expression = self.Expression
-        self._function = self.Function
-        self._if = self.If
-        self._print = self.Print
-        self._return = self.Return
-        self._var = self.Var
-        self._while = self.While
-
     class Block:
-        def __init__(
-            self,
-            statements,
-        ):
+        __slots__ = ("statements", "local_count", "captured")
+
+        def __init__(self, statements):
             self.statements = statements
+            self.local_count = None
+            self.captured = None
 
         def accept(self, visitor):
             return visitor.visit_block_stmt(self)
 
     class Break:
-        def __init__(
-            self,
-            keyword,
-        ):
+        __slots__ = ("keyword",)
+
+        def __init__(self, keyword):
             self.keyword = keyword
 
         def accept(self, visitor):
             return visitor.visit_break_stmt(self)
 
     class Continue:
-        def __init__(
-            self,
-            keyword,
-        ):
+        __slots__ = ("keyword",)
+
+        def __init__(self, keyword):
             self.keyword = keyword
 
         def accept(self, visitor):
             return visitor.visit_continue_stmt(self)
 
     class Expression:
-        def __init__(
-            self,
-            expression,
-        ):
+        __slots__ = ("expression",)
+
+        def __init__(self, expression):
             self.expression = expression
 
         def accept(self, visitor):
             return visitor.visit_expression_stmt(self)
 
+    class For:
+        __slots__ = ("initializer", "condition", "increment", "body", "local_count", "captured", "counted", "iterations", "compiled")
+
+        def __init__(self, initializer, condition, increment, body):
+            self.initializer = initializer
+            self.condition = condition
+            self.increment = increment
+            self.body = body
+            self.local_count = None
+            self.captured = None
+            self.counted = None
+            self.iterations = None
+            self.compiled = None
+
+        def accept(self, visitor):
+            return visitor.visit_for_stmt(self)
+
     class Function:
-        def __init__(
-            self,
-            name,
-            params,
-            body,
-        ):
+        __slots__ = ("name", "params", "body", "memoized", "slot", "cell", "local_count", "captured", "free", "escapes")
+
+        def __init__(self, name, params, body, memoized):
             self.name = name
             self.params = params
             self.body = body
+            self.memoized = memoized
+            self.slot = None
+            self.cell = None
+            self.local_count = None
+            self.captured = None
+            self.free = None
+            self.escapes = None
 
         def accept(self, visitor):
             return visitor.visit_function_stmt(self)
 
     class If:
-        def __init__(
-            self,
-            condition,
-            then_branch,
-            else_branch,
-        ):
+        __slots__ = ("condition", "then_branch", "else_branch")
+
+        def __init__(self, condition, then_branch, else_branch):
             self.condition = condition
             self.then_branch = then_branch
             self.else_branch = else_branch
@@ -111,47 +118,46 @@ class Stmt:
             return visitor.visit_if_stmt(self)
 
     class Print:
-        def __init__(
-            self,
-            expression,
-        ):
+        __slots__ = ("expression",)
+
+        def __init__(self, expression):
             self.expression = expression
 
         def accept(self, visitor):
             return visitor.visit_print_stmt(self)
 
     class Return:
-        def __init__(
-            self,
-            keyword,
-            value,
-        ):
+        __slots__ = ("keyword", "value", "tail_call")
+
+        def __init__(self, keyword, value):
             self.keyword = keyword
             self.value = value
+            self.tail_call = None
 
         def accept(self, visitor):
             return visitor.visit_return_stmt(self)
 
     class Var:
-        def __init__(
-            self,
-            name,
-            initializer,
-        ):
+        __slots__ = ("name", "initializer", "slot", "cell")
+
+        def __init__(self, name, initializer):
             self.name = name
             self.initializer = initializer
+            self.slot = None
+            self.cell = None
 
         def accept(self, visitor):
             return visitor.visit_var_stmt(self)
 
     class While:
-        def __init__(
-            self,
-            condition,
-            body,
-        ):
+        __slots__ = ("condition", "body", "iterations", "compiled")
+
+        def __init__(self, condition, body):
             self.condition = condition
             self.body = body
+            self.iterations = None
+            self.compiled = None
 
         def accept(self, visitor):
             return visitor.visit_while_stmt(self)
+
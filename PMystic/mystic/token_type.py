@@ -46,6 +46,7 @@ TOKENS = [
     "WHILE",
     "BREAK",
     "CONTINUE",
+    "MEMO",
     # End of file token.
     "EOF",
     # Ternary operator token.
@@ -79,6 +80,10 @@ class TokenType(Enum):
     def __str__(self):
         return self.name
 
+    def __reduce_ex__(self, protocol):
+        # Members are attached after the class is built, so unpickle by name.
+        return getattr, (self.__class__, self._name_)
+
 
 TokenType._init_next_value()
 for token in TOKENS:
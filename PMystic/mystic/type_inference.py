@@ -0,0 +1,245 @@
+from expr import Expr
+from stmt import Stmt
+from token_type import TokenType
+from ast_fields import fields
+
+# Types are sets of the kinds of value an expression can produce, as bits.
+NUMBER = 1
+STRING = 2
+BOOL = 4
+NIL = 8
+OTHER = 16
+ANY = NUMBER | STRING | BOOL | NIL | OTHER
+
+
+class TypeInference(Stmt.Visitor, Expr.Visitor):
+    """
+    Flow-insensitive type inference over a resolved program. Every variable
+    gets the union of the types of all values the program ever stores in it,
+    whichever order that happens in, and passes over the program repeat until
+    no variable's type grows. Binary operators whose operands then always
+    produce numbers are rewritten into Numeric nodes, and additions of two
+    strings into Concat nodes, so engines can skip the type checks for them.
+
+    Locals are told apart by the scope that declares them and their slot, as
+    the resolver numbered them. Parameters can receive anything, and so can
+    globals other code may assign: those bound before the program runs and,
+    at the REPL, every one.
+    """
+
+    def __init__(self, interpreter, repl: bool = False):
+        self.__globals = interpreter.globals
+        self.__repl = repl
+        self.__types = {}
+        # Binary nodes rewritten in every program processed so far.
+        self.specialized = 0
+
+    def specialize(self, statements):
+        while True:
+            self.__changed = False
+            self.__scopes = []
+            self.__rewrites = {}
+            self.__statements(statements)
+            if not self.__changed:
+                break
+
+        # The last pass saw the final types, so its rewrites are sound.
+        self.specialized += len(self.__rewrites)
+        return [self.__rewrite(stmt) for stmt in statements]
+
+    # ------- Helper Functions ------- #
+
+    def __expr(self, expr):
+        return expr.accept(self)
+
+    def __statements(self, statements):
+        for stmt in statements:
+            stmt.accept(self)
+
+    def __key(self, depth, slot, name):
+        """The variable a resolved name refers to."""
+        if depth is None:
+            return name.lexeme
+        return self.__scopes[-1 - depth], slot
+
+    def __declared(self, stmt):
+        """The variable a Var or Function statement declares."""
+        if not self.__scopes:
+            return stmt.name.lexeme
+        return self.__scopes[-1], stmt.slot
+
+    def __store(self, key, value):
+        old = self.__types.get(key, 0)
+        if old | value != old:
+            self.__types[key] = old | value
+            self.__changed = True
+
+    def __load(self, key):
+        if type(key) is str and (self.__repl or key in self.__globals):
+            return ANY
+        return self.__types.get(key, 0)
+
+    def __rewrite(self, node):
+        """Node, or a list of them, with the rewritten Binary nodes replaced."""
+        if type(node) is list:
+            node[:] = [self.__rewrite(child) for child in node]
+            return node
+        if not hasattr(node, "accept"):
+            return node
+
+        node = self.__rewrites.get(node, node)
+        for field in fields(node):
+            setattr(node, field, self.__rewrite(getattr(node, field)))
+        return node
+
+    # ------- Statements ------- #
+
+    def visit_block_stmt(self, stmt):
+        # Only blocks that declare something open a scope.
+        if stmt.local_count == 0:
+            self.__statements(stmt.statements)
+            return
+
+        self.__scopes.append(stmt)
+        self.__statements(stmt.statements)
+        self.__scopes.pop()
+
+    def visit_break_stmt(self, stmt):
+        pass
+
+    def visit_continue_stmt(self, stmt):
+        pass
+
+    def visit_expression_stmt(self, stmt):
+        self.__expr(stmt.expression)
+
+    def visit_for_stmt(self, stmt):
+        if stmt.local_count != 0:
+            self.__scopes.append(stmt)
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+        self.__expr(stmt.condition)
+        if stmt.increment is not None:
+            self.__expr(stmt.increment)
+        stmt.body.accept(self)
+        if stmt.local_count != 0:
+            self.__scopes.pop()
+
+    def visit_function_stmt(self, stmt):
+        self.__store(self.__declared(stmt), OTHER)
+
+        self.__scopes.append(stmt)
+        for slot in range(len(stmt.params)):
+            self.__store((stmt, slot), ANY)
+        self.__statements(stmt.body)
+        self.__scopes.pop()
+
+    def visit_if_stmt(self, stmt):
+        self.__expr(stmt.condition)
+        stmt.then_branch.accept(self)
+        if stmt.else_branch is not None:
+            stmt.else_branch.accept(self)
+
+    def visit_print_stmt(self, stmt):
+        self.__expr(stmt.expression)
+
+    def visit_return_stmt(self, stmt):
+        if stmt.value is not None:
+            self.__expr(stmt.value)
+
+    def visit_var_stmt(self, stmt):
+        value = NIL
+        if stmt.initializer is not None:
+            value = self.__expr(stmt.initializer)
+        self.__store(self.__declared(stmt), value)
+
+    def visit_while_stmt(self, stmt):
+        self.__expr(stmt.condition)
+        stmt.body.accept(self)
+
+    # ------- Expressions ------- #
+
+    def visit_assign_expr(self, expr):
+        value = self.__expr(expr.value)
+        self.__store(self.__key(expr.depth, expr.slot, expr.name), value)
+        return value
+
+    def visit_ternary_expr(self, expr):
+        self.__expr(expr.condition)
+        return self.__expr(expr.true_expr) | self.__expr(expr.false_expr)
+
+    def visit_binary_expr(self, expr):
+        left = self.__expr(expr.left)
+        right = self.__expr(expr.right)
+        token_type = expr.operator.token_type
+
+        if left == NUMBER and right == NUMBER and token_type in self.numeric:
+            self.__rewrites[expr] = Expr.Numeric(expr.left, expr.operator, expr.right)
+        elif left == STRING and right == STRING and token_type == TokenType.PLUS:
+            self.__rewrites[expr] = Expr.Concat(expr.left, expr.operator, expr.right)
+
+        if not left or not right:
+            return 0
+        if token_type == TokenType.PLUS:
+            # Numbers add, strings concatenate with strings and numbers, and
+            # anything else gives nil.
+            result = 0
+            if left & NUMBER and right & NUMBER:
+                result |= NUMBER
+            if left & STRING and right & (NUMBER | STRING):
+                result |= STRING
+            if left & NUMBER and right & STRING:
+                result |= STRING
+            if (left | right) & ~(NUMBER | STRING):
+                result |= NIL
+            return result
+        return self.numeric.get(token_type, NIL)
+
+    # Result types of the operators Numeric nodes implement. Other operands
+    # make them raise rather than produce another type.
+    numeric = {
+        TokenType.PLUS: NUMBER,
+        TokenType.MINUS: NUMBER,
+        TokenType.STAR: NUMBER,
+        TokenType.SLASH: NUMBER,
+        TokenType.GREATER: BOOL,
+        TokenType.GREATER_EQUAL: BOOL,
+        TokenType.LESS: BOOL,
+        TokenType.LESS_EQUAL: BOOL,
+        TokenType.EQUAL_EQUAL: BOOL,
+        TokenType.BANG_EQUAL: BOOL,
+    }
+
+    def visit_call_expr(self, expr):
+        self.__expr(expr.callee)
+        for argument in expr.arguments:
+            self.__expr(argument)
+        return ANY
+
+    def visit_grouping_expr(self, expr):
+        return self.__expr(expr.expression)
+
+    def visit_literal_expr(self, expr):
+        return self.literals.get(type(expr.value), OTHER)
+
+    literals = {
+        float: NUMBER,
+        int: NUMBER,
+        str: STRING,
+        bool: BOOL,
+        type(None): NIL,
+    }
+
+    def visit_logical_expr(self, expr):
+        return self.__expr(expr.left) | self.__expr(expr.right)
+
+    def visit_unary_expr(self, expr):
+        self.__expr(expr.right)
+        if expr.operator.token_type == TokenType.MINUS:
+            return NUMBER
+        if expr.operator.token_type == TokenType.BANG:
+            return BOOL
+        return NIL
+
+    def visit_variable_expr(self, expr):
+        return self.__load(self.__key(expr.depth, expr.slot, expr.name))
@@ -2,36 +2,42 @@ import sys
 
 
 class GenerateAst:
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, slots: bool = True):
         self.__output_dir = output_dir
+        self.__slots = slots
         self.define_ast(
             "Expr",
             [
-                "Assign   : name, value",
+                "Assign   : name, value | depth, slot, upvalue, cell, version, binding",
                 "Ternary  : condition, true_expr, false_expr",
-                "Binary   : left, operator, right",
-                "Call     : callee, paren, arguments",
+                "Binary   : left, operator, right | handler",
+                "Call     : callee, paren, arguments | target",
                 "Grouping : expression",
                 "Literal  : value",
-                "Logical  : left, operator, right",
-                "Unary    : operator, right",
-                "Variable : name",
+                "Logical  : left, operator, right | handler",
+                "Unary    : operator, right | handler",
+                "Variable : name | depth, slot, upvalue, cell, version, binding",
+                # Binary operators whose operands type inference proved to
+                # always be numbers, or (for +) always strings.
+                "Numeric  : left, operator, right | handler",
+                "Concat   : left, operator, right",
             ],
         )
 
         self.define_ast(
             "Stmt",
             [
-                "Block       : statements",
+                "Block       : statements | local_count, captured",
                 "Break       : keyword",
                 "Continue    : keyword",
                 "Expression  : expression",
-                "Function    : name, params, body",
+                "For         : initializer, condition, increment, body | local_count, captured, counted, iterations, compiled",
+                "Function    : name, params, body, memoized | slot, cell, local_count, captured, free, escapes",
                 "If          : condition, then_branch, else_branch",
                 "Print       : expression",
-                "Return      : keyword, value",
-                "Var         : name, initializer",
-                "While       : condition, body",
+                "Return      : keyword, value | tail_call",
+                "Var         : name, initializer | slot, cell",
+                "While       : condition, body | iterations, compiled",
             ],
         )
 
@@ -40,36 +46,37 @@ class GenerateAst:
         writer = open(path, "w")
         writer.write("class " + base_name + ":\n")
         self.define_vistior(writer, base_name, types)
-        writer.write("    def __init__(self):\n")
-
-        for type in types:
-            class_name = type.split(":")[0].strip()
-            writer.write(
-                "        self._" + class_name.lower() + " = self." + class_name + "\n"
-            )
-        writer.write("\n")
 
         for type in types:
             class_name = type.split(":")[0].strip()
             fields = type.split(":")[1].strip()
-            self.define_type(writer, base_name, class_name, fields)
+            # Names after "|" are annotations filled in by the resolver, or
+            # inline caches the interpreter fills in as it runs.
+            fields, _, annotations = fields.partition("|")
+            self.define_type(writer, base_name, class_name, fields, annotations)
 
-    def define_type(self, writer, base_name, class_name, field_list):
-        writer.write("    class " + class_name + ":\n")
+        writer.close()
 
-        if field_list != "":
-            fields = field_list.split(", ")
-            writer.write("        def __init__(self, ")
+    def define_type(self, writer, base_name, class_name, field_list, annotation_list):
+        writer.write("    class " + class_name + ":\n")
+        fields = [field.strip() for field in field_list.split(",") if field.strip()]
+        annotations = [
+            field.strip() for field in annotation_list.split(",") if field.strip()
+        ]
 
-            for field in fields:
-                name = field.strip()
-                writer.write(name + ", ")
+        if self.__slots:
+            slots = ", ".join('"' + field + '"' for field in fields + annotations)
+            if len(fields + annotations) == 1:
+                slots += ","
+            writer.write("        __slots__ = (" + slots + ")\n\n")
 
-            writer.write("):\n")
+        if fields:
+            writer.write("        def __init__(self, " + ", ".join(fields) + "):\n")
 
-            for field in fields:
-                name = field.strip()
+            for name in fields:
                 writer.write("            self." + name + " = " + name + "\n")
+            for name in annotations:
+                writer.write("            self." + name + " = None\n")
 
             writer.write("\n")
 
@@ -95,8 +102,13 @@ class GenerateAst:
                 + base_name.lower()
                 + "):\n"
             )
-            writer.write("            pass\n")
+            writer.write("            pass\n\n")
+
 
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python generate_ast.py <output directory> [--no-slots]")
+        sys.exit(64)
 
-output_dir = sys.argv[1]
-GenerateAst(output_dir)
+    output_dir = sys.argv[1]
+    GenerateAst(output_dir, slots="--no-slots" not in sys.argv[2:])